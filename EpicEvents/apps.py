@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EpiceventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'EpicEvents'
+
+    def ready(self):
+        # Connect the signals invalidating the permission decisions
+        from EpicEvents import permission_cache # noqa: F401
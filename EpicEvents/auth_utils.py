@@ -1,70 +1,291 @@
 import jwt  # Importing the jwt library to encode and decode JWT tokens.
 import json  # Importing the json library for reading and writing data in JSON format.
 import os  # Importing the os library to interact with the operating system, e.g., for file handling.
+import re  # Importing re to sanitize the session names.
+import time  # Importing time to date the revocation cache.
+import getpass  # Importing getpass to key the default session by the OS user.
+import tempfile  # Importing tempfile to write the session files atomically.
+from contextvars import ContextVar  # Importing ContextVar to select the session of a request served by crm_server.
+from contextlib import contextmanager  # Importing contextmanager to define the file lock.
+try:
+    import fcntl  # Importing fcntl to lock the shared files (POSIX only).
+except ImportError:
+    fcntl = None
 from django.conf import settings  # Importing Django's settings to access project settings.
-from datetime import datetime, timezone  # Importing datetime to work with dates and times.
-from EpicEvents.models import User  # Importing the User model from the epicevents app.
+from datetime import datetime, timedelta, timezone  # Importing datetime to work with dates and times.
+from django.db.models import F  # Importing F to increment the token version in the database.
+from EpicEvents.models import TokenRevocation, User  # Importing the models of the epicevents app.
+
+
+
+# Function to get the default directory of the session files, private to the OS user: a directory of the runtime
+# directory of the user, or of ~/.epicevents. Each checkout of the project (and its database) gets its own one.
+def default_session_dir(project_dir=None):
+    base = os.path.join(os.environ['XDG_RUNTIME_DIR'], 'epicevents') if os.getenv('XDG_RUNTIME_DIR') \
+        else os.path.join(os.path.expanduser('~'), '.epicevents')
+    # e.g. ~/.epicevents/home_alice_EpicEventsCRM for the checkout in /home/alice/EpicEventsCRM
+    return os.path.join(base, re.sub(r'[^\w.-]', '_', str(project_dir or settings.BASE_DIR).strip(os.sep)))
+
+
+SESSION_DIR = os.getenv('EPICEVENTS_SESSION_DIR') or default_session_dir() # Directory holding one token file per session.
+REVOCATION_FILE_NAME = "revocations.json" # Local cache of the token versions of the users whose tokens were revoked.
+REVOCATION_CACHE_TTL = 300 # Seconds after which the revocation cache is refreshed from the database.
+ACCESS_TOKEN_LIFETIME = timedelta(hours=2) # Lifetime of the token checked by every command.
+REFRESH_TOKEN_LIFETIME = timedelta(hours=12) # The session can be extended without password until then, sliding at each refresh.
+SESSION_MAX_LIFETIME = timedelta(days=7) # After this time since the login, the password is asked again.
+
+# Token file of the client whose request is being served by crm_server, instead of the session of the server process.
+current_token_file = ContextVar('current_token_file', default=None)
+
+
+# Function to get the name of a session (the current session by default), usable as a file name.
+def get_session_id(session=None):
+    # EPICEVENTS_SESSION lets scripts and batch jobs keep their own session, by default people sharing a host
+    # get one session each
+    session = session or os.getenv('EPICEVENTS_SESSION')
+    if not session:
+        try:
+            session = getpass.getuser()
+        except (KeyError, OSError):
+            session = 'default'
+    return re.sub(r'[^\w.-]', '_', session)
+
+
+# Function to get the path of the token file of a session (the current session by default).
+def get_token_file_path(session=None, session_dir=None):
+    if session is None and current_token_file.get() is not None:
+        return current_token_file.get()
+    return os.path.join(session_dir or SESSION_DIR, f"{get_session_id(session)}.token")
+
+
+# Function to replace the content of a file atomically.
+def write_file_atomically(path, content):
+    # The content is written to a temporary file of the same directory, then renamed over the file:
+    # a reader sees the old or the new content, never a half-written file.
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, mode=0o700, exist_ok=True) # The session directory is private to the OS user.
+    file_descriptor, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-') # Readable by the owner only.
+    try:
+        with os.fdopen(file_descriptor, 'w') as temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+# Context manager holding an exclusive lock on a file shared by several processes.
+@contextmanager
+def file_lock(path):
+    # The lock is taken on a separate .lock file, so the locked file itself can still be renamed over
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+# Function to load the data saved at login for a session (the current session by default).
+def load_session(session=None):
+    try:
+        with open(get_token_file_path(session), 'r') as token_file:
+            return json.load(token_file) # Loading the JSON data from the file.
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+# Function to delete the token of a session (the current session by default).
+def delete_token(session=None):
+    try:
+        os.remove(get_token_file_path(session))
+        return True
+    except FileNotFoundError:
+        return False
 
-TOKEN_FILE_PATH = ".token" # Defining the path to the file where the token will be stored.
 
 # Function to load an authentication token from a file.
 def load_token():
+    data = load_session()
     try:
-        # Attempting to open the token file in read mode.
-        with open(TOKEN_FILE_PATH, 'r') as token_file:
-            data = json.load(token_file) # Loading the JSON data from the file.
-            # Returning the token and its expiration time as a datetime object.
-            return data['token'], datetime.fromtimestamp(data['expiration_time'], timezone.utc)
-    except(FileNotFoundError, json.JSONDecodeError, KeyError):
+        # Returning the token and its expiration time as a datetime object.
+        return data['token'], datetime.fromtimestamp(data['expiration_time'], timezone.utc)
+    except KeyError:
         # If file is not found, JSON is invalid, or expected key is missing, return None for both values.
         return None, None
     
 
+# Function to read the expiration time of a token without verifying it, validate_token verifies the token.
+def token_expiration_time(token):
+    try:
+        payload = jwt.decode(token, options={'verify_signature': False})
+        return datetime.fromtimestamp(payload['exp'], timezone.utc)
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        return None
+
+
 # Function to generate a new authentication token for a user.
-def generate_token(user, expiration_time):
-    # Encoding a new JWT token with user's ID and expiration time.
+def generate_token(user, expiration_time, session_start=None):
+    # Encoding a new JWT token with user's ID, role, names, token version and expiration time.
+    # The claims are signed, so validate_token can trust them until expiry without reading the user.
     token = jwt.encode({
             'user_id': user.id, 
+            'user_role': user.role,
+            'user_name': user.fullname,
+            'username': user.username,
+            'token_version': user.token_version,
             'exp': expiration_time
         }, settings.TOKEN_KEY, algorithm='HS256')
+
+    # Encoding the refresh token, which extends the session without the password until the end of the session.
+    session_start = session_start or datetime.now(timezone.utc).timestamp()
+    session_end = datetime.fromtimestamp(session_start, timezone.utc) + SESSION_MAX_LIFETIME
+    refresh_expiration_time = min(datetime.now(timezone.utc) + REFRESH_TOKEN_LIFETIME, session_end)
+    refresh_token = jwt.encode({
+            'type': 'refresh',
+            'user_id': user.id,
+            'token_version': user.token_version,
+            'session_start': session_start,
+            'exp': refresh_expiration_time
+        }, settings.TOKEN_KEY, algorithm='HS256')
     
-    # Opening the token file in write mode to save the token.
-    with open(TOKEN_FILE_PATH, 'w') as token_file:
-        # Writing the token and related information as JSON to the file.
-        token_file.write(json.dumps({
-                    'token': token,
-                    'expiration_time': expiration_time.timestamp(), # Converting expiration_time to a timestamp.
-                    'user_id': user.id,
-                    'user_role': user.role,
-                    'user_name': user.fullname,
-                }))
+    # Writing the token and related information as JSON to the token file of the session.
+    write_file_atomically(get_token_file_path(), json.dumps({
+                'token': token,
+                'expiration_time': expiration_time.timestamp(), # Converting expiration_time to a timestamp.
+                'refresh_token': refresh_token,
+                'refresh_expiration_time': refresh_expiration_time.timestamp(),
+                'user_id': user.id,
+                'user_role': user.role,
+                'user_name': user.fullname,
+            }))
     return token # Returning the generated token.
 
 
+# Function to extend the current session with its refresh token, returns the new token and its expiration time.
+def refresh_session():
+    refresh_token = load_session().get('refresh_token')
+    if not refresh_token:
+        return None, None
+    try:
+        payload = jwt.decode(refresh_token, settings.TOKEN_KEY, algorithms=['HS256'])
+    except jwt.InvalidTokenError:
+        # The refresh token expired (or is invalid): the password must be entered again.
+        return None, None
+    if payload.get('type') != 'refresh':
+        return None, None
+
+    # The user is read again, which is much cheaper than hashing the password, and gives up-to-date claims.
+    try:
+        user = User.objects.get(id=payload['user_id'])
+    except User.DoesNotExist:
+        return None, None
+    if payload['token_version'] < user.token_version:
+        # The tokens of the user were revoked.
+        return None, None
+
+    now = datetime.now(timezone.utc)
+    session_end = datetime.fromtimestamp(payload['session_start'], timezone.utc) + SESSION_MAX_LIFETIME
+    expiration_time = min(now + ACCESS_TOKEN_LIFETIME, session_end)
+    if expiration_time <= now:
+        return None, None
+    generate_token(user, expiration_time, session_start=payload['session_start'])
+    return load_token()
+
+
+# Function to build the logged in user from the claims of a token, without a database query.
+def user_from_claims(payload):
+    user = User(
+        id=payload['user_id'],
+        role=payload['user_role'],
+        fullname=payload['user_name'],
+        username=payload['username'],
+        token_version=payload['token_version'],
+    )
+    # Only the claimed fields are set: the user can be used in queries and relations, but must never be saved.
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+# Function to read the revocation cache, returns the token versions keyed by user ID and the time of the last refresh.
+def read_revocations():
+    try:
+        with open(os.path.join(SESSION_DIR, REVOCATION_FILE_NAME), 'r') as revocation_file:
+            data = json.load(revocation_file)
+            return data['versions'], data['refreshed_at']
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, TypeError):
+        return {}, 0
+
+
+# Function to refresh the revocation cache from the database, with the given extra stamps.
+def refresh_revocations(extra_versions=None):
+    path = os.path.join(SESSION_DIR, REVOCATION_FILE_NAME)
+    # Processes refreshing the cache at the same time would otherwise lose each other's stamps
+    with file_lock(path):
+        versions, _ = read_revocations()
+        # The revocations made on other machines are read from the database. The revocation table keeps the ones
+        # of the deleted users.
+        stamps = list(User.objects.filter(token_version__gt=0).values_list('id', 'token_version'))
+        stamps += list(TokenRevocation.objects.values_list('user_id', 'token_version'))
+        stamps += list((extra_versions or {}).items())
+        for user_id, version in stamps:
+            versions[str(user_id)] = max(version, versions.get(str(user_id), 0))
+        write_file_atomically(path, json.dumps({'refreshed_at': time.time(), 'versions': versions}))
+    return versions
+
+
+# Function to load the token versions of the users whose tokens were revoked, keyed by user ID.
+def load_revocations():
+    versions, refreshed_at = read_revocations()
+    if time.time() - refreshed_at < REVOCATION_CACHE_TTL:
+        return versions
+    # The cache is missing or stale
+    return refresh_revocations()
+
+
+# Function to revoke the tokens issued to a user (role or names changed, user deleted).
+def revoke_tokens(user):
+    User.objects.filter(pk=user.pk).update(token_version=F('token_version') + 1)
+    user.token_version += 1
+    # The revocation outlives the user, so it is recorded in its own table
+    TokenRevocation.objects.update_or_create(user_id=user.pk, defaults={'token_version': user.token_version})
+    refresh_revocations({user.pk: user.token_version})
+
+
 # Function to validate an existing token.
 def validate_token(token):
-    token, expiration_time = load_token()
-    print("expiration time,", expiration_time)
-    print("utc time,", datetime.now(timezone.utc))
-    print("expiration time > time: ", expiration_time > datetime.now(timezone.utc))
+    # The token and its expiration time, as returned by load_token (the file is not read again)
+    token, expiration_time = token
 
     # Checking if token exists, has an expiration time, and is not yet expired.
     if token and expiration_time and expiration_time > datetime.now(timezone.utc):
         try:
             # Decoding the token to verify its validity and extract payload.
             payload = jwt.decode(token, settings.TOKEN_KEY, algorithms=['HS256'])
-            print(payload) # Printing the payload for debugging or logging purposes.
-            user_id = payload['user_id'] # Extracting user_id from the payload.
-            user = User.objects.get(id=user_id) # Retrieving the user object by its ID.
-            return user # Returning the user object if token is valid and user exists.
-        except jwt.ExpiredSignatureError:
-            # If the token is expired, delete the token file.
-            os.remove(TOKEN_FILE_PATH)
-            return None # Returning None to indicate token is no longer valid.
         except jwt.InvalidTokenError:
-            # If the token is invalid for any reason other than being expired, return None.
+            # If the token is invalid or expired, return None (the session file is kept for refresh_session).
+            return None
+
+        if payload.get('type') == 'refresh':
+            # A refresh token only extends the session, it does not authenticate a command.
             return None
-        except User.DoesNotExist:
-            # If the user does not exist, return None.
+
+        if 'user_role' not in payload:
+            # Token issued before the role claims: the user is read from the database.
+            try:
+                return User.objects.get(id=payload['user_id'])
+            except User.DoesNotExist:
+                return None
+
+        # Checking the token was not revoked since it was issued.
+        if payload['token_version'] < load_revocations().get(str(payload['user_id']), 0):
             return None
+        return user_from_claims(payload) # Returning the user described by the token.
     return None # Returning None if token is not found, expired, or invalid for any reason.
@@ -0,0 +1,140 @@
+# Description: This file contains the index used by the shell completion of the commands: the names of the commands,
+# their options, and the ID and name of the clients, contracts, events and users the logged in user can read.
+# The index is a JSON file next to the token file of the session, read by `crm.py --complete` without Django,
+# and refreshed from the rows whose updated_at changed since the last refresh.
+import json
+import os
+from datetime import datetime
+from django.core.management import get_commands, load_command_class
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+from EpicEvents.auth_utils import get_token_file_path, write_file_atomically
+from EpicEvents.models import Client, Contract, Event, User
+
+INDEX_VERSION = 1 # Incremented when the format of the index changes, the index is then rebuilt
+
+# Indexed models: queryset of the rows the user can read, fields of the name, and the updated_at fields of the
+# rows the name is read from
+INDEXED_MODELS = {
+    'clients': (lambda user: Client.objects.visible_to(user), ('fullname',), ('updated_at',)),
+    'contracts': (lambda user: Contract.objects.visible_to(user), ('client__fullname', 'status'),
+                  ('updated_at', 'client__updated_at')),
+    'events': (lambda user: Event.objects.visible_to(user), ('name',), ('updated_at',)),
+    'users': (lambda user: User.objects.all(), ('fullname',), ('updated_at',)),
+}
+
+# Arguments taking the ID of an indexed model
+ID_ARGUMENTS = {
+    'client_id': 'clients',
+    'contract_id': 'contracts',
+    'event_id': 'events',
+    'user_id': 'users',
+    'sales_rep_id': 'users',
+    'support_staff_id': 'users',
+}
+
+# Options added by Django to every command, not completed
+BASE_OPTIONS = ('help', 'version', 'verbosity', 'settings', 'pythonpath', 'traceback', 'no_color', 'force_color',
+                'skip_checks')
+
+
+def get_index_path():
+    # The index of the current session, next to its token file
+    return os.path.splitext(get_token_file_path())[0] + '.index.json'
+
+
+def load_index(path):
+    try:
+        with open(path, 'r') as index_file:
+            index = json.load(index_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return index if isinstance(index, dict) and index.get('version') == INDEX_VERSION else None
+
+
+def command_specs():
+    # Options of the commands of the app, the options taking an ID, and the choices of the other options
+    specs = {}
+    for name, app in get_commands().items():
+        if app != 'EpicEvents':
+            continue
+        try:
+            parser = load_command_class(app, name).create_parser('manage.py', name)
+        except AttributeError:
+            # a helper module of the commands package (utils)
+            continue
+        spec = {'options': [], 'ids': {}, 'values': {}, 'positional': None}
+        for action in parser._actions:
+            if action.dest in BASE_OPTIONS:
+                continue
+            if not action.option_strings:
+                spec['positional'] = ID_ARGUMENTS.get(action.dest, spec['positional'])
+                continue
+            spec['options'].extend(action.option_strings)
+            for option in action.option_strings:
+                if action.dest in ID_ARGUMENTS:
+                    spec['ids'][option] = ID_ARGUMENTS[action.dest]
+                elif action.choices:
+                    spec['values'][option] = [str(choice) for choice in action.choices]
+        specs[name] = spec
+    return specs
+
+
+def row_names(queryset, name_fields):
+    # Names of the rows by ID (a JSON key is a string)
+    return {str(row[0]): ' - '.join(str(value) for value in row[1:] if value is not None)
+            for row in queryset.values_list('id', *name_fields)}
+
+
+def refresh_index(user, path=None, full=False):
+    # Updates the index of the session with the rows changed since the last refresh, and writes it.
+    # A row changed but no longer readable by the user (reassigned) is removed. The deleted rows send no
+    # updated_at: when the number of rows or the sum of their IDs differs from the database, the IDs of the model
+    # are read again. Returns the index.
+    path = path or get_index_path()
+    index = None if full else load_index(path)
+    if index is None or index.get('user_id') != user.id:
+        index = {'version': INDEX_VERSION, 'user_id': user.id, 'synced_at': {}, 'commands': command_specs()}
+
+    for model_name, (get_queryset, name_fields, updated_fields) in INDEXED_MODELS.items():
+        queryset = get_queryset(user)
+        # Rows saved during the refresh are read again by the next one
+        synced_at = timezone.now()
+        names = index.get(model_name)
+        since = index['synced_at'].get(model_name)
+        if names is None or since is None:
+            names = row_names(queryset, name_fields)
+        else:
+            since = datetime.fromisoformat(since)
+            changed = Q()
+            for field in updated_fields:
+                changed |= Q(**{f'{field}__gte': since})
+            changed_names = row_names(queryset.filter(changed), name_fields)
+            for pk in queryset.model.objects.filter(changed).values_list('id', flat=True):
+                names.pop(str(pk), None)
+            names.update(changed_names)
+            totals = queryset.aggregate(count=Count('id'), ids=Sum('id'))
+            if (totals['count'], totals['ids'] or 0) != (len(names), sum(int(pk) for pk in names)):
+                kept = set(str(pk) for pk in queryset.values_list('id', flat=True))
+                names = {pk: name for pk, name in names.items() if pk in kept}
+        index[model_name] = names
+        index['synced_at'][model_name] = synced_at.isoformat()
+
+    write_file_atomically(path, json.dumps(index))
+    return index
+
+
+def shell_script(shell, crm_path, python):
+    # Script registering the completion of crm.py and manage.py in the shell. crm.py only uses the standard
+    # library, python -S skips the site-packages set-up
+    script = (
+        "_epicevents_crm() {\n"
+        "    local IFS=$'\\n'\n"
+        f"    COMPREPLY=($('{python}' -S '{crm_path}' --complete \"$COMP_CWORD\" \"${{COMP_WORDS[@]}}\" 2>/dev/null"
+        " | cut -f1))\n"
+        "}\n"
+        "complete -F _epicevents_crm crm.py ./crm.py manage.py ./manage.py\n"
+    )
+    if shell == 'zsh':
+        script = "autoload -U +X bashcompinit && bashcompinit\n" + script
+    return script
@@ -0,0 +1,85 @@
+# Description: This file contains the filters shared by the read_* commands.
+import re
+from datetime import date, timedelta
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+
+PERIOD_HELP = 'YYYY-MM-DD, YYYY-MM, YYYY, today, this-month, next-N-days or last-N-days'
+
+
+def first_day_of_next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def parse_period(value):
+    # Returns the first day of the period and the day after its last day, so the period can be used in half-open ranges
+    today = timezone.localdate()
+    value = value.strip().lower()
+
+    if value == 'today':
+        return today, today + timedelta(days=1)
+    if value == 'this-month':
+        first_day = today.replace(day=1)
+        return first_day, first_day_of_next_month(first_day)
+
+    relative = re.fullmatch(r'(next|last)-(\d+)-days?', value)
+    if relative:
+        days = int(relative.group(2))
+        if relative.group(1) == 'next':
+            # today and the N - 1 following days
+            return today, today + timedelta(days=days)
+        # today and the N - 1 previous days
+        return today - timedelta(days=days - 1), today + timedelta(days=1)
+
+    try:
+        parts = [int(part) for part in value.split('-')]
+        if len(parts) == 3:
+            day = date(*parts)
+            return day, day + timedelta(days=1)
+        if len(parts) == 2:
+            first_day = date(parts[0], parts[1], 1)
+            return first_day, first_day_of_next_month(first_day)
+        if len(parts) == 1:
+            return date(parts[0], 1, 1), date(parts[0] + 1, 1, 1)
+    except ValueError:
+        pass
+    raise CommandError(f"Invalid date or period '{value}', use {PERIOD_HELP}.")
+
+
+def filter_date_range(queryset, field, date_from=None, date_to=None, within=None):
+    # Filter a date field with >= / < predicates, which can use the index of the field (unlike __icontains)
+    if date_from:
+        queryset = queryset.filter(**{f'{field}__gte': parse_period(date_from)[0]})
+    if date_to:
+        # The end of the range is inclusive: --to 2024-05 keeps the whole month of May
+        queryset = queryset.filter(**{f'{field}__lt': parse_period(date_to)[1]})
+    if within:
+        start, end = parse_period(within)
+        queryset = queryset.filter(**{f'{field}__gte': start, f'{field}__lt': end})
+    return queryset
+
+
+def filter_number_range(queryset, field, minimum=None, maximum=None):
+    # Filter a numeric field with inclusive >= / <= predicates, which can use the index of the field
+    if minimum is not None:
+        queryset = queryset.filter(**{f'{field}__gte': minimum})
+    if maximum is not None:
+        queryset = queryset.filter(**{f'{field}__lte': maximum})
+    return queryset
+
+
+def fts_query(text):
+    # Turn free text into an FTS5 query where every word is matched as a prefix ("conf" finds "conference")
+    words = re.findall(r'\w+', text)
+    if not words:
+        raise CommandError("The search must contain at least one word.")
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def filter_search(queryset, text, index='search'):
+    # Full-text search through the FTS5 index joined as `index`, the rows are annotated with their search_rank
+    if connection.vendor != 'sqlite':
+        raise CommandError("Full-text search requires an SQLite database.")
+    return queryset.filter(**{f'{index}__match': fts_query(text)}).annotate(search_rank=F(f'{index}__rank'))
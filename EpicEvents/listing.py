@@ -0,0 +1,374 @@
+# Description: This file contains the shared listing layer used by the read_* commands to display clients, contracts, events and users.
+import base64
+import csv
+import json
+from decimal import Decimal
+from itertools import chain, islice
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import CommandError
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from EpicEvents.models import Client, Contract, Event, User
+
+CHUNK_SIZE = 2000 # Number of rows fetched from the database at a time
+SAMPLE_SIZE = 100 # Number of rows read before writing the table, used to compute the column widths
+MAX_COLUMN_WIDTH = 40 # Longer values are truncated so the width of the table stays bounded
+FORMATS = ('table', 'csv', 'tsv', 'jsonl') # Output formats of the read_* commands
+
+
+def add_listing_arguments(parser, listing):
+    # Paging options shared by every read_* command
+    parser.add_argument('--page-size', type=int, help='Number of rows to display per page', required=False)
+    parser.add_argument('--after', type=str, help='Cursor printed at the end of the previous page', required=False)
+    parser.add_argument('--order-by', type=str, required=False,
+                        choices=[prefix + field for field in listing.sort_fields for prefix in ('', '-')],
+                        help='Sort column, prefix with "-" for descending order (default: id, or best matches first with --search)')
+    parser.add_argument('--format', type=str, default='table', choices=FORMATS,
+                        help='Output format, csv, tsv and jsonl are streamed for other programs')
+    parser.add_argument('--columns', type=str, required=False,
+                        help='Comma separated fields to display, related fields use "__" (ex: id,name,contract__client__fullname)')
+    if listing.groups:
+        # Summary options, computed by the database with a single GROUP BY query
+        parser.add_argument('--count', action='store_true', help='Only display the number of rows and their totals')
+        parser.add_argument('--group-by', type=str, choices=list(listing.groups), required=False,
+                            help='Count the rows and sum their totals by group')
+
+
+def encode_cursor(order_by, value, pk):
+    # The cursor holds the sort column and the position of the last row of the page
+    data = json.dumps([order_by, value, pk], default=str)
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor, order_by):
+    try:
+        cursor_order_by, value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise CommandError("Invalid cursor.")
+    if cursor_order_by != order_by:
+        raise CommandError(f"This cursor was created for --order-by {cursor_order_by}.")
+    return value, pk
+
+
+class Page:
+    # A page of a listing, fetched with a keyset predicate on (sort column, id) so deep pages stay as fast as the first one
+    def __init__(self, queryset, order_by='id', page_size=None, after=None):
+        if page_size is not None and page_size < 1:
+            raise CommandError("--page-size must be a positive integer.")
+
+        descending = order_by.startswith('-')
+        field = order_by.lstrip('-')
+        # id breaks the ties between rows sharing the same sort value
+        ordering = [order_by] if field == 'id' else [order_by, '-id' if descending else 'id']
+        queryset = queryset.order_by(*ordering)
+
+        if after:
+            value, pk = decode_cursor(after, order_by)
+            lookup = 'lt' if descending else 'gt'
+            if field == 'id':
+                queryset = queryset.filter(**{f'id__{lookup}': pk})
+            else:
+                queryset = queryset.filter(Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': pk}))
+
+        if page_size is not None:
+            queryset = queryset[:page_size]
+
+        self.queryset = queryset
+        self.order_by = order_by
+        self.field = field
+        self.page_size = page_size
+        self.count = 0 # Number of rows read so far
+        self.last_key = None # (sort value, id) of the last row read so far
+
+    def __iter__(self):
+        # Rows are fetched by chunks, so memory does not grow with the size of the result
+        for obj in self.queryset.iterator(chunk_size=CHUNK_SIZE):
+            self.count += 1
+            self.last_key = (getattr(obj, self.field), obj.id)
+            yield obj
+
+    def values(self, fields):
+        # Rows as tuples of the given fields, read with values_list() so no model is instantiated
+        for row in self.queryset.values_list(*fields, self.field, 'id').iterator(chunk_size=CHUNK_SIZE):
+            self.count += 1
+            self.last_key = row[-2:]
+            yield row[:-2]
+
+    def exists(self):
+        return self.queryset.exists()
+
+    @property
+    def next_cursor(self):
+        # A full page means there may be more rows after it
+        if self.page_size is None or self.count < self.page_size:
+            return None
+        return encode_cursor(self.order_by, *self.last_key)
+
+
+def json_default(value):
+    # Dates and datetimes are written in ISO 8601 format
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def cell_text(value):
+    # Text of a table cell, on a single line
+    return '' if value is None else str(value).replace('\n', ' ')
+
+
+class TableWriter:
+    # Writes a table in the "pretty" format of tabulate, one line per row, as the rows arrive
+    def __init__(self, stdout, headers, sample):
+        self.stdout = stdout
+        # The widths are computed on a sample of the rows, the text values of the other rows are truncated to fit
+        self.widths = [
+            max(len(header), min(MAX_COLUMN_WIDTH, max((len(cell_text(row[i])) for row in sample), default=0)))
+            for i, header in enumerate(headers)
+        ]
+        self.separator = '+' + '+'.join('-' * (width + 2) for width in self.widths) + '+'
+        self.headers = headers
+
+    def line(self, values):
+        cells = []
+        for value, width in zip(values, self.widths):
+            text = cell_text(value)
+            # IDs and amounts are copied by the users, a number wider than the sample overflows its column instead
+            if len(text) > width and not isinstance(value, (int, float, Decimal)):
+                text = text[:width - 3] + '...' if width > 3 else text[:width]
+            # Extra space goes to the right, like tabulate
+            left = (width - len(text)) // 2
+            cells.append(' ' * left + text + ' ' * (width - len(text) - left))
+        return '| ' + ' | '.join(cells) + ' |'
+
+    def write_title(self, title):
+        self.stdout.write(title.center(len(self.separator)))
+
+    def write_header(self):
+        self.stdout.write(self.separator)
+        self.stdout.write(self.line(self.headers))
+        self.stdout.write(self.separator)
+
+    def write_row(self, row):
+        self.stdout.write(self.line(row))
+
+    def write_footer(self):
+        self.stdout.write(self.separator)
+
+
+class Column:
+    # A column of a listing
+    def __init__(self, header, field, accessor=None):
+        self.header = header # Header of the column in the table
+        self.field = field # Field path of the column, read with values_list() by the machine-readable formats
+        self.accessor = accessor or (lambda obj: getattr(obj, field)) # Value of the column in the table
+
+
+class Listing:
+    # Describes how the rows of a model are displayed by a read_* command
+    def __init__(self, model, title, columns, related=(), sort_fields=('id',), groups=None, totals=()):
+        self.model = model # Model listed by the command
+        self.title = title # Title displayed above the table
+        self.columns = columns # Columns displayed by the command
+        self.related = related # Relations displayed in the table, fetched in the same query as the rows
+        self.sort_fields = sort_fields # Columns that can be used to sort and page the listing
+        self.groups = groups or {} # --group-by choices: fields (or (name, expression) pairs) identifying a group
+        self.totals = totals # Numeric fields summed by the summaries
+
+    @property
+    def headers(self):
+        return [column.header for column in self.columns]
+
+    @property
+    def fields(self):
+        return [column.field for column in self.columns]
+
+    def prepare(self, queryset):
+        # Join every displayed relation so the number of queries does not grow with the number of rows
+        return queryset.select_related(*self.related)
+
+    def page(self, queryset, options=None):
+        # Build the page requested by the paging options of the command
+        options = options or {}
+        # Search results are ranked by relevance unless another order is requested. A queryset not filtered by
+        # filter_search (a single ID) has no rank
+        default_order = 'search_rank' if 'search_rank' in queryset.query.annotations else 'id'
+        return Page(self.prepare(queryset), order_by=options.get('order_by') or default_order,
+                    page_size=options.get('page_size'), after=options.get('after'))
+
+    def check_field(self, path):
+        # Ensure a --columns entry is a field of the model, or of a model it points to
+        model = self.model
+        for name in path.split('__'):
+            if model is None:
+                raise CommandError(f"Unknown column '{path}'.")
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise CommandError(f"Unknown column '{path}'.")
+            # Reverse and many-to-many relations would repeat the rows, password hashes are never displayed
+            if field.one_to_many or field.many_to_many or (field.model is User and field.name == 'password'):
+                raise CommandError(f"Column '{path}' cannot be displayed.")
+            model = field.related_model
+
+    def select_columns(self, names=None):
+        # Columns requested with --columns (comma separated field paths), all the columns by default
+        if not names:
+            return self.columns
+        known = {column.field: column for column in self.columns}
+        columns = []
+        for name in names.split(','):
+            name = name.strip()
+            if name not in known:
+                self.check_field(name)
+            columns.append(known.get(name) or Column(name, name))
+        return columns
+
+    def rows(self, page):
+        for obj in page:
+            yield [column.accessor(obj) for column in self.columns]
+
+    def write(self, stdout, page, format='table', columns=None, stderr=None):
+        selected = self.select_columns(columns)
+        fields = [column.field for column in selected]
+        if format == 'table':
+            # A projection only reads the selected fields from the database
+            rows = page.values(fields) if columns else self.rows(page)
+            self.write_table(stdout, [column.header for column in selected], rows)
+        else:
+            self.write_values(stdout, fields, page.values(fields), format)
+            # Keep the cursor out of the data so the output can be parsed as is
+            stdout = stderr or stdout
+
+        if page.next_cursor:
+            stdout.write(f"Next page: --after {page.next_cursor}")
+
+    def summary(self, queryset, group_by=None):
+        # Count the rows and sum the totals, by group if requested, in a single query
+        group = self.groups[group_by] if group_by else []
+        fields = [item if isinstance(item, str) else item[0] for item in group]
+        aggregates = {'count': Count('id')}
+        aggregates.update({f'sum_{field}': Sum(field) for field in self.totals})
+
+        # order_by() drops the ordering of the listing, which would otherwise be added to the GROUP BY
+        queryset = queryset.order_by()
+        if group_by:
+            expressions = {item[0]: item[1] for item in group if not isinstance(item, str)}
+            rows = queryset.values(*[item for item in group if isinstance(item, str)], **expressions)
+            rows = rows.annotate(**aggregates).order_by(*fields)
+        else:
+            rows = [queryset.aggregate(**aggregates)]
+
+        fields += list(aggregates)
+        return fields, ([row[field] for field in fields] for row in rows)
+
+    def write_summary(self, stdout, queryset, group_by=None, format='table'):
+        fields, rows = self.summary(queryset, group_by)
+        if format == 'table':
+            self.write_table(stdout, fields, rows, title=f"{self.title} (summary)")
+        else:
+            self.write_values(stdout, fields, rows, format)
+
+    def write_values(self, stdout, fields, rows, format):
+        # Stream the raw values of the fields, without building model instances nor laying out a table
+        if format == 'jsonl':
+            for row in rows:
+                stdout.write(json.dumps(dict(zip(fields, row)), default=json_default))
+        else:
+            writer = csv.writer(stdout, delimiter='\t' if format == 'tsv' else ',', lineterminator='\n')
+            writer.writerow(fields)
+            writer.writerows(rows)
+
+    def write_table(self, stdout, headers, rows, title=None):
+        # Stream the rows to stdout, only the sample used for the column widths is held in memory
+        sample = list(islice(rows, SAMPLE_SIZE))
+
+        table = TableWriter(stdout, headers, sample)
+        table.write_title(title or self.title)
+        table.write_header()
+        for row in chain(sample, rows):
+            table.write_row(row)
+        table.write_footer()
+
+
+EVENT_LISTING = Listing(
+    model=Event,
+    title="List of Events",
+    columns=[
+        Column("ID", 'id'),
+        Column("Contract", 'contract_id', lambda event: event.contract),
+        Column("Name", 'name'),
+        Column("Start Date", 'start_date'),
+        Column("End Date", 'end_date'),
+        Column("Support Staff", 'support_staff__username', lambda event: event.support_staff),
+        Column("Location", 'location'),
+        Column("Number of Participants", 'attendees'),
+        Column("Notes", 'notes'),
+    ],
+    # Contract.__str__ displays the client of the contract
+    related=('contract__client', 'support_staff'),
+    sort_fields=('id', 'name', 'start_date', 'end_date', 'attendees'),
+    groups={
+        'status': ['contract__status'],
+        'sales_rep': ['contract__sales_rep__username'],
+        'client': ['contract__client_id', 'contract__client__fullname'],
+        'support_staff': ['support_staff__username'],
+        'month': [('month', TruncMonth('start_date'))],
+    },
+    totals=('attendees',),
+)
+
+CONTRACT_LISTING = Listing(
+    model=Contract,
+    title="List of Contracts",
+    columns=[
+        Column("ID", 'id'),
+        Column("Client", 'client__fullname', lambda contract: contract.client),
+        Column("Sales Rep", 'sales_rep__username', lambda contract: contract.sales_rep),
+        Column("Total Amount", 'total_amount'),
+        Column("Amount Remaining", 'amount_remaining'),
+        Column("Status", 'status'),
+        Column("Date of création", 'created_at'),
+    ],
+    related=('client', 'sales_rep'),
+    sort_fields=('id', 'total_amount', 'amount_remaining', 'status', 'created_at'),
+    groups={
+        'status': ['status'],
+        'sales_rep': ['sales_rep__username'],
+        # client names are not unique, the ID keeps homonyms apart
+        'client': ['client_id', 'client__fullname'],
+        'month': [('month', TruncMonth('created_at'))],
+    },
+    totals=('total_amount', 'amount_remaining'),
+)
+
+CLIENT_LISTING = Listing(
+    model=Client,
+    title="List of Clients",
+    columns=[
+        Column("ID", 'id'),
+        Column("Full Name", 'fullname'),
+        Column("Email", 'email'),
+        Column("Phone", 'phone'),
+        Column("Company", 'company_name'),
+        Column("Sales rep", 'sales_rep__username', lambda client: client.sales_rep),
+        Column("Created at", 'created_at', lambda client: client.created_at.strftime('%Y-%m-%d')),
+        Column("Last update", 'updated_at', lambda client: client.updated_at.strftime('%Y-%m-%d')),
+    ],
+    related=('sales_rep',),
+    sort_fields=('id', 'fullname', 'email', 'company_name', 'created_at'),
+    groups={
+        'sales_rep': ['sales_rep__username'],
+        'month': [('month', TruncMonth('created_at'))],
+    },
+)
+
+USER_LISTING = Listing(
+    model=User,
+    title="List of users",
+    columns=[
+        Column("ID", 'id'),
+        Column("Full Name", 'fullname'),
+        Column("Username", 'username'),
+        Column("Role", 'role'),
+    ],
+    sort_fields=('id', 'fullname', 'username', 'role'),
+)
@@ -0,0 +1,26 @@
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from EpicEvents.completion import refresh_index, shell_script, INDEXED_MODELS
+from EpicEvents.permissions import get_login_context
+
+
+class Command(BaseCommand):
+    """A management command for the shell completion of the commands. `completion bash` (or zsh) prints the script
+    registering the completion, `completion refresh` updates the index of IDs and names it reads. crm.py refreshes
+    the index in the background when it is older than a few seconds."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['bash', 'zsh', 'refresh'],
+                            help='Print the completion script of a shell, or refresh the index')
+        parser.add_argument('--full', action='store_true', help='Rebuild the index instead of updating it')
+
+    def handle(self, *args, **options):
+        if options['action'] != 'refresh':
+            self.stdout.write(shell_script(options['action'], settings.BASE_DIR / 'crm.py', sys.executable), ending='')
+            return
+
+        auth = get_login_context()
+        index = refresh_index(auth.user, full=options['full'])
+        counts = ', '.join(f"{len(index[model_name])} {model_name}" for model_name in INDEXED_MODELS)
+        self.stdout.write(self.style.SUCCESS(f"Completion index refreshed: {counts}."))
@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand
-from EpicEvents.models import Client, User
+from EpicEvents.models import Client
 from django.utils import timezone
-from EpicEvents.permissions import require_login, is_sales_team, get_user_id_from_token
+from EpicEvents.permissions import require_login, is_sales_team
 
 
 class Command(BaseCommand):
@@ -29,12 +29,8 @@ class Command(BaseCommand):
 
         created_at = timezone.now()
 
-        sales_rep_id = get_user_id_from_token()
-        try:
-            sales_rep = User.objects.get(id=sales_rep_id)
-        except User.DoesNotExist:
-            self.stderr.write(self.style.ERROR(f"User with ID {sales_rep_id} does not exist."))
-            return
+        # The logged in user, loaded by require_login
+        sales_rep = kwargs['auth'].user
 
         client = Client.objects.create(
                 sales_rep=sales_rep,
@@ -1,4 +1,4 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from EpicEvents.models import Contract, User, Client
 from EpicEvents.permissions import is_management_team, require_login
 
@@ -30,26 +30,22 @@ class Command(BaseCommand):
 
         valid_status = [choice[0] for choice in Contract.STATUS_CHOICES]
         if status not in valid_status:
-            self.stdout.write(self.style.ERROR(f"The status '{status}' is invalid. Choose from the following options: {', '.join(valid_status)}"))
-            return
+            raise CommandError(f"The status '{status}' is invalid. Choose from the following options: {', '.join(valid_status)}")
 
         # check if client and sales rep with given IDs exist
         try:
             client = Client.objects.get(pk=client_id)
         except Client.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f"No clients found with ID {client_id}."))
-            return
+            raise CommandError(f"No clients found with ID {client_id}.")
 
         try:
             sales_rep = User.objects.get(pk=sales_rep_id)
         except User.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f"No sales team member found with ID {sales_rep_id}."))
-            return
+            raise CommandError(f"No sales team member found with ID {sales_rep_id}.")
 
         # check if employee role is sales
         if sales_rep.role != 'sales':
-            self.stdout.write(self.style.ERROR(f"The employee with the ID {sales_rep_id} does not have the role 'sales'."))
-            return
+            raise CommandError(f"The employee with the ID {sales_rep_id} does not have the role 'sales'.")
 
         contract = Contract.objects.create(
             client=client,
@@ -61,8 +61,7 @@ class Command(BaseCommand):
             start_date = datetime.strptime(start_date, '%Y%m%d').date()
             end_date = datetime.strptime(end_date, '%Y%m%d').date()
         except ValueError:
-            self.stdout.write(self.style.ERROR("Invalid date format, use the format YYYYMMDD."))
-            return
+            raise CommandError("Invalid date format, use the format YYYYMMDD.")
 
         # create the event
         event = Event.objects.create(
@@ -1,4 +1,4 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 import getpass
 from EpicEvents.models import User
 from EpicEvents.permissions import is_management_team, require_login
@@ -33,9 +33,7 @@ class Command(BaseCommand):
         # verify that the role is a valid choice
         valid_roles = [r[0] for r in User.ROLE_CHOICES]  # get the valid roles
         if role not in valid_roles:
-            # print error message
-            self.stdout.write(self.style.ERROR(f"The role '{role}' is invalid. Use one of the following : {', '.join(valid_roles)}"))
-            return
+            raise CommandError(f"The role '{role}' is invalid. Use one of the following : {', '.join(valid_roles)}")
 
         # print the inputs
         self.stdout.write(self.style.SUCCESS(f"Inputs: {fullname}, {role}, {username}"))
@@ -0,0 +1,133 @@
+import getpass
+import io
+import json
+import os
+import socket
+import sys
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from EpicEvents.auth_utils import current_token_file, get_token_file_path, SESSION_DIR
+
+SOCKET_PATH = os.getenv('EPICEVENTS_SOCKET', os.path.join(SESSION_DIR, 'crm.sock')) # Socket shared with crm.py
+LOCAL_COMMANDS = ('login', 'execute', 'crm_server', 'serve_stdio') # Commands the client always runs in its own process
+
+
+def prompt_unavailable(prompt=''):
+    # Replaces getpass.getpass while a request is served, the password would be asked on the terminal of the server
+    raise EOFError(prompt)
+
+
+def client_disconnected(*streams):
+    # Whether a write to the client already failed, nothing more can be sent to it
+    return any(getattr(stream, 'disconnected', False) for stream in streams)
+
+
+class SocketStream(io.TextIOBase):
+    # Text stream sending each write to the client as a JSON line, so the output is streamed while the command runs
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.name = name
+        self.disconnected = False # The client went away (Ctrl-C, `| head`), the next writes are discarded
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if text and not self.disconnected:
+            try:
+                self.connection.sendall((json.dumps({self.name: text}) + '\n').encode())
+            except OSError:
+                # The command stops on this error, its error report must not be sent to the dead socket again
+                self.disconnected = True
+                raise
+        return len(text)
+
+
+class Command(BaseCommand):
+    """A management command keeping a warm Django process (settings, apps, caches and database connection) that runs
+    the commands sent by crm.py on a local Unix socket. The requests are served one after the other."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', type=str, default=SOCKET_PATH, help='Path of the Unix socket')
+
+    def handle(self, *args, **options):
+        path = options['socket']
+        os.makedirs(os.path.dirname(path) or '.', mode=0o700, exist_ok=True)
+        if os.path.exists(path):
+            os.remove(path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the owner can connect: the requests run with the sessions of the owner
+        umask = os.umask(0o177)
+        try:
+            server.bind(path)
+        finally:
+            os.umask(umask)
+        server.listen(16)
+        self.stdout.write(self.style.SUCCESS(f"CRM server listening on {path}"))
+
+        try:
+            while True:
+                connection, _ = server.accept()
+                with connection:
+                    try:
+                        self.serve(connection)
+                    except OSError as e:
+                        # A client disconnected before the end of its response (BrokenPipe, ConnectionReset)
+                        self.stderr.write(f"Client disconnected: {e}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            os.remove(path)
+
+    def serve(self, connection):
+        # One request: a JSON line with the argv, working directory and session of the client
+        request = json.loads(connection.makefile('r').readline() or 'null')
+        if not request or not request.get('argv'):
+            return
+        stdout, stderr = SocketStream(connection, 'stdout'), SocketStream(connection, 'stderr')
+        exit_code, interactive = self.run(request, stdout, stderr)
+        connection.sendall((json.dumps({'exit': exit_code, 'interactive': interactive}) + '\n').encode())
+
+    def run(self, request, stdout, stderr):
+        # Runs the command like manage.py would in the client's directory, with the client's session.
+        # Returns the exit code, and whether the command needs the terminal of the client.
+        name, *args = request['argv']
+        if name in LOCAL_COMMANDS:
+            return 0, True
+
+        working_directory = os.getcwd()
+        token_file = current_token_file.set(os.path.join(
+            request['cwd'], get_token_file_path(request.get('session'), request.get('session_dir'))))
+        stdin, ask_password = sys.stdin, getpass.getpass
+        close_old_connections()
+        try:
+            os.chdir(request['cwd'])
+            # Prompts cannot be answered through the socket
+            sys.stdin = io.StringIO()
+            getpass.getpass = prompt_unavailable
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                call_command(name, *args, force_color=request.get('color', False))
+            return 0, False
+        except EOFError:
+            return 0, True
+        except CommandError as e:
+            if not client_disconnected(stdout, stderr):
+                stderr.write(f"{e.__class__.__name__}: {e}\n")
+            return e.returncode, False
+        except SystemExit as e:
+            # --help and argument errors
+            return e.code if isinstance(e.code, int) else 1, False
+        except Exception:
+            if not client_disconnected(stdout, stderr):
+                stderr.write(traceback.format_exc())
+            return 1, False
+        finally:
+            sys.stdin, getpass.getpass = stdin, ask_password
+            os.chdir(working_directory)
+            current_token_file.reset(token_file)
+            close_old_connections()
@@ -1,4 +1,4 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from EpicEvents.models import Contract
 from EpicEvents.permissions import require_login, is_management_team
 
@@ -20,5 +20,4 @@ class Command(BaseCommand):
             self.stdout.write(self.style.SUCCESS(f"contract with ID {contract_id} deleted sucessfully."))
 
         except Contract.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f"contract with ID {contract_id} does not exist"))
-            return
+            raise CommandError(f"contract with ID {contract_id} does not exist")
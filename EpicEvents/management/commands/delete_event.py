@@ -1,24 +1,23 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from EpicEvents.models import Event
 from EpicEvents.permissions import require_login, is_event_support_or_is_management_team
 
 
 class Command(BaseCommand):
-    """A management command to delete an event. This command is only accessible to event support team members."""
+    """A management command to delete one or more events. This command is only accessible to event support team members."""
 
     def add_arguments(self, parser):
-        parser.add_argument('event_id', type=int, help='ID of event to delete')
+        parser.add_argument('event_id', type=int, nargs='+', help='ID of event to delete (several IDs can be given)')
 
     @require_login
     @is_event_support_or_is_management_team
     def handle(self, *args, **options):
-        event_id = options['event_id']
+        # The events, loaded and checked in one query by is_event_support_or_is_management_team
+        events = options['events']
 
         try:
-            event = Event.objects.get(pk=event_id)
-            event.delete()
-            self.stdout.write(self.style.SUCCESS(f"Évent with ID {event_id} deleted sucessfully."))
-        except Event.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f"Event with ID {event_id} does not exist."))
+            Event.objects.filter(pk__in=[event.pk for event in events]).delete()
+            for event in events:
+                self.stdout.write(self.style.SUCCESS(f"Event with ID {event.pk} deleted sucessfully."))
         except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Uno error has occurred: {e}"))
+            raise CommandError(f"An error has occurred: {e}")
@@ -1,6 +1,9 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import ProtectedError
 from EpicEvents.models import User
 from EpicEvents.permissions import require_login, is_management_team
+from EpicEvents.auth_utils import revoke_tokens
 
 
 class Command(BaseCommand):
@@ -16,7 +19,14 @@ class Command(BaseCommand):
 
         try:
             user = User.objects.get(id=user_id)
-            user.delete()
+            with transaction.atomic():
+                # the queryset delete keeps the ID of the instance, used by revoke_tokens
+                User.objects.filter(pk=user.pk).delete()
+                # the tokens already issued to the user must not be trusted until they expire, they are only
+                # revoked once the user is deleted
+                revoke_tokens(user)
             self.stdout.write(self.style.SUCCESS(f"User with ID {user_id} deleted sucessfully"))
         except User.DoesNotExist:
-            self.stderr.write(self.style.ERROR(f"User with ID {user_id} not found"))
+            raise CommandError(f"User with ID {user_id} not found")
+        except ProtectedError:
+            raise CommandError(f"User with ID {user_id} is the support contact of events, reassign them first")
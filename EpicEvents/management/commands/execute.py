@@ -1,16 +1,32 @@
-from django.core.management.base import BaseCommand
-from django.core.management import call_command
+import shlex
+import sys
+from contextlib import nullcontext
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from EpicEvents.permission_cache import permission_cache
+from EpicEvents.permissions import get_login_context
 from . import utils
 
 class Command(BaseCommand):
     help = 'Perform an action'
 
     def add_arguments(self, parser):
-        parser.add_argument('user_role', type=str, help='Role of logged in user')
+        parser.add_argument('user_role', type=str, nargs='?', help='Role of logged in user')
+        parser.add_argument('--script', type=str,
+                            help='Run the commands of a file, one per line ("-" reads them from stdin)')
+        parser.add_argument('--atomic', action='store_true',
+                            help='With --script, save no change if a command of the script fails')
 
     def handle(self, *args, **kwargs):
+        if kwargs.get('script'):
+            return self.run_script(kwargs['script'], kwargs.get('atomic', False))
+        if not kwargs.get('user_role'):
+            raise CommandError("Give the role of the logged in user, or a script to run with --script.")
+
         user_role = kwargs['user_role']
         user_input = 0
+        # The menu actions run the commands in this process, with the login checked once per token (see utils.MenuSession)
+        self.session = utils.MenuSession()
 
         if user_role == "management":
             while(user_input != 'x'):
@@ -74,7 +90,7 @@ class Command(BaseCommand):
 
                 # Logout
                 elif user_input == 'x':
-                    call_command('logout')
+                    self.session.logout()
 
                 else:
                     self.stdout.write(self.style.ERROR('\nInvalid input! Enter a choice from the list'))
@@ -115,7 +131,7 @@ class Command(BaseCommand):
 
                 # Logout
                 elif user_input == 'x':
-                    call_command('logout')
+                    self.session.logout()
 
                 else:
                     self.stdout.write(self.style.ERROR('\nInvalid input! Enter a choice from the list'))
@@ -136,9 +152,64 @@ class Command(BaseCommand):
 
                 # Logout
                 elif user_input == 'x':
-                    call_command('logout')
+                    self.session.logout()
 
                 else:
                     self.stdout.write(self.style.ERROR('\nInvalid input! Enter a choice from the list'))
                     continue
 
+    def run_script(self, path, atomic):
+        # Runs the command lines of a script in this process, with the same AuthContext. Blank lines and the text
+        # after a "#" are ignored. The errors are reported with their line number and the next lines still run.
+        # With atomic, the script runs in one transaction rolled back if a line fails, each line in a savepoint.
+        try:
+            if path == '-':
+                script = sys.stdin.read()
+            else:
+                with open(path) as file:
+                    script = file.read()
+        except OSError as e:
+            raise CommandError(f"Cannot read the script: {e}")
+
+        session = utils.MenuSession()
+        session.auth = get_login_context()
+        count, failures = 0, 0
+
+        with utils.prompts_disabled(), (transaction.atomic() if atomic else nullcontext()):
+            for number, line in enumerate(script.splitlines(), 1):
+                try:
+                    argv = shlex.split(line, comments=True)
+                except ValueError as e:
+                    # unbalanced quotes
+                    count, failures = count + 1, failures + 1
+                    self.stderr.write(f"line {number}: {e}")
+                    continue
+                if not argv:
+                    continue
+                count += 1
+                try:
+                    with transaction.atomic() if atomic else nullcontext():
+                        session.run_line(argv)
+                except EOFError:
+                    failures += 1
+                    self.stderr.write(f"line {number}: {argv[0]} asks for input, give all its options")
+                except SystemExit as e:
+                    # --help, or invalid arguments reported by the parser of the command
+                    if e.code not in (0, None):
+                        failures += 1
+                        self.stderr.write(f"line {number}: invalid arguments for {argv[0]}")
+                except Exception as e:
+                    # any error of a command fails its line only, the script goes on
+                    failures += 1
+                    self.stderr.write(f"line {number}: {e}")
+            if atomic and failures:
+                transaction.set_rollback(True)
+
+        summary = f"{count} commands run, {failures} failed"
+        if failures:
+            if atomic:
+                # the decisions cached for the rolled back changes are dropped
+                permission_cache.clear()
+                summary += ", no change was saved"
+            raise CommandError(summary + ".")
+        self.stdout.write(self.style.SUCCESS(summary + "."))
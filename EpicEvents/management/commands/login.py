@@ -1,8 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
 # from pytz import timezone
-from EpicEvents.auth_utils import generate_token
-from datetime import datetime, timedelta, timezone
+from EpicEvents.auth_utils import generate_token, ACCESS_TOKEN_LIFETIME
+from datetime import datetime, timezone
 from django.contrib.auth import authenticate
 import getpass
 
@@ -20,7 +20,7 @@ class Command(BaseCommand):
         user = authenticate(username=username, password=password)
 
         if user:
-            expiration_time = datetime.now(timezone.utc) + timedelta(hours=2)
+            expiration_time = datetime.now(timezone.utc) + ACCESS_TOKEN_LIFETIME
             token = generate_token(user, expiration_time)
 
             self.stdout.write(self.style.SUCCESS(f'Login successful! Hello : {user.fullname}'))
@@ -1,18 +1,23 @@
 from django.core.management.base import BaseCommand
-from EpicEvents.auth_utils import load_token
 import os
+from EpicEvents.auth_utils import load_token, delete_token
+from EpicEvents.completion import get_index_path
 
 
 class Command(BaseCommand):
-    """A management command to logout a user. The user's token is deleted from the file system."""
+    """A management command to logout a user. The token of the current session is deleted from the file system."""
 
     def handle(self, *args, **options):
         # Load token from file
         token, _ = load_token()
 
         if token:
-            # delete .token file
-            os.remove('.token')
+            # delete the token file of the session, and the names of its completion index
+            delete_token()
+            try:
+                os.remove(get_index_path())
+            except FileNotFoundError:
+                pass
             self.stdout.write(self.style.SUCCESS('Logout successful!'))
         else:
             self.stdout.write(self.style.SUCCESS('No tokens found. The user is not logged in.'))
@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand, CommandError
-from tabulate import tabulate
 from EpicEvents.models import Client
 from EpicEvents.permissions import require_login
+from EpicEvents.listing import CLIENT_LISTING, add_listing_arguments
+from EpicEvents.filters import filter_search
 
 
 class Command(BaseCommand):
@@ -13,6 +14,8 @@ class Command(BaseCommand):
         parser.add_argument('--email', type=str, help='Filter customers by e-mail', required=False)
         parser.add_argument('--phone', type=str, help='Filter customers by phone', required=False)
         parser.add_argument('--company_name', type=str, help='Filter customers by company name', required=False)
+        parser.add_argument('--search', type=str, help='Full-text search in full name, e-mail and company name (best matches first)', required=False)
+        add_listing_arguments(parser, CLIENT_LISTING)
 
     @require_login
     def handle(self, *args, **options):
@@ -23,14 +26,17 @@ class Command(BaseCommand):
         company_filter = options['company_name']
 
         if client_id is not None:
-            try:
-                client = Client.objects.get(id=client_id)
-                self.print_clients_details([client])
-            except Client.DoesNotExist:
+            clients = Client.objects.filter(id=client_id)
+            if clients.exists():
+                self.print_clients_details(CLIENT_LISTING.page(clients, options), options)
+            else:
                 raise CommandError(f"Client with ID {client_id} not found.")
         else:
             clients = Client.objects.all()
 
+            if options['search']:
+                clients = filter_search(clients, options['search'])
+
             if fullname_filter:
                 clients = clients.filter(fullname__icontains=fullname_filter)
 
@@ -41,29 +47,17 @@ class Command(BaseCommand):
                 clients = clients.filter(phone__icontains=phone_filter)
 
             if company_filter:
-                clients = clients.filter(company__icontains=company_filter)
+                clients = clients.filter(company_name__icontains=company_filter)
+
+            if options['count'] or options['group_by']:
+                # only the aggregate rows are displayed
+                CLIENT_LISTING.write_summary(self.stdout, clients, options['group_by'], options['format'])
+                return
 
-            if clients:
-                self.print_clients_details(clients)
+            if clients.exists():
+                self.print_clients_details(CLIENT_LISTING.page(clients, options), options)
             else:
                 self.stdout.write(self.style.SUCCESS("No clients found."))
 
-    def print_clients_details(self, data):
-        headers = ["ID", "Full Name", "Email", "Phone", "Company", "Sales rep", "Created at",
-                   "Last update"]
-        rows = []
-
-        for item in data:
-            formatted_created_at = item.created_at.strftime('%Y-%m-%d')
-            formatted_updated_at = item.updated_at.strftime('%Y-%m-%d')
-            row = [item.id, item.fullname, item.email,
-                   item.phone, item.company_name, item.sales_rep,
-                   formatted_created_at, formatted_updated_at]
-            rows.append(row)
-
-        title = "List of Clients"
-        table = tabulate(rows, headers=headers, tablefmt="pretty")
-
-        # Utilisation d'une chaîne de format traditionnelle
-        table_with_title = "{}\n{}".format(title.center(len(table.split('\n')[0])), table)
-        print(table_with_title)
+    def print_clients_details(self, page, options):
+        CLIENT_LISTING.write(self.stdout, page, options['format'], options['columns'], stderr=self.stderr)
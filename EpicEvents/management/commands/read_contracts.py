@@ -1,7 +1,8 @@
-from django.core.management.base import BaseCommand
-from tabulate import tabulate
+from django.core.management.base import BaseCommand, CommandError
 from EpicEvents.models import Contract
 from EpicEvents.permissions import require_login
+from EpicEvents.listing import CONTRACT_LISTING, add_listing_arguments
+from EpicEvents.filters import PERIOD_HELP, filter_date_range, filter_number_range, filter_search
 
 
 class Command(BaseCommand):
@@ -13,8 +14,19 @@ class Command(BaseCommand):
         parser.add_argument('--sales_rep', type=str, help='Filter Contracts by sales rep (name or ID)', required=False)
         parser.add_argument('--total_amount', type=float, help='Filter Contracts total amount', required=False)
         parser.add_argument('--amount_remaining', type=float, help='Filter Contracts by amount remaining', required=False)
-        parser.add_argument('--status', type=str, help='Filter Contracts by status (waiting for signature, signed, in progress, finished, terminated, cancelled)', required=False)
+        parser.add_argument('--min-total', type=float, help='Filter Contracts with a total amount of at least this value', required=False)
+        parser.add_argument('--max-total', type=float, help='Filter Contracts with a total amount of at most this value', required=False)
+        parser.add_argument('--min-remaining', type=float, help='Filter Contracts with an amount remaining of at least this value', required=False)
+        parser.add_argument('--max-remaining', type=float, help='Filter Contracts with an amount remaining of at most this value', required=False)
+        parser.add_argument('--unpaid', action='store_true', help='Only display Contracts with an amount remaining to be paid')
+        parser.add_argument('--status', type=str, choices=[choice[0] for choice in Contract.STATUS_CHOICES],
+                            help='Filter Contracts by status, the status index is used', required=False)
         parser.add_argument('--created_at', type=str, help='Filter Contracts by date of création (format : YYYY-MM-DD)', required=False)
+        parser.add_argument('--search', type=str, help='Full-text search in the full name, e-mail and company name of the client (best matches first)', required=False)
+        parser.add_argument('--created-from', type=str, help=f'Filter Contracts created on or after ({PERIOD_HELP})', required=False)
+        parser.add_argument('--created-to', type=str, help=f'Filter Contracts created on or before ({PERIOD_HELP})', required=False)
+        parser.add_argument('--created-within', type=str, help='Filter Contracts created within a period (ex: this-month, last-30-days)', required=False)
+        add_listing_arguments(parser, CONTRACT_LISTING)
 
     @require_login
     def handle(self, *args, **kwargs):
@@ -27,14 +39,17 @@ class Command(BaseCommand):
         created_at_filter = kwargs['created_at']
 
         if contract_id is not None:
-            try:
-                contract = Contract.objects.get(pk=contract_id)
-                self.print_Contract_details([contract])
-            except Contract.DoesNotExist:
-                self.stdout.write(self.style.ERROR(f"No Contract found with ID {contract_id}."))
+            contracts = Contract.objects.filter(pk=contract_id)
+            if contracts.exists():
+                self.print_Contract_details(CONTRACT_LISTING.page(contracts, kwargs), kwargs)
+            else:
+                raise CommandError(f"No Contract found with ID {contract_id}.")
         else:
             contracts = Contract.objects.all()
 
+            if kwargs['search']:
+                contracts = filter_search(contracts, kwargs['search'], index='client__search')
+
             if client_filter:
                 # ID filtering test
                 try:
@@ -59,29 +74,31 @@ class Command(BaseCommand):
             if amount_remaining_filter:
                 contracts = contracts.filter(amount_remaining=amount_remaining_filter)
 
+            # amount ranges are compiled to >= / <= predicates on the indexed amount fields
+            contracts = filter_number_range(contracts, 'total_amount', kwargs['min_total'], kwargs['max_total'])
+            contracts = filter_number_range(contracts, 'amount_remaining', kwargs['min_remaining'], kwargs['max_remaining'])
+
+            if kwargs['unpaid']:
+                contracts = contracts.filter(amount_remaining__gt=0)
+
             if status_filter:
-                contracts = contracts.filter(status__icontains=status_filter)
+                contracts = contracts.filter(status=status_filter)
+
+            # date filters are compiled to ranges, so the index on created_at can be used
+            contracts = filter_date_range(contracts, 'created_at', kwargs['created_from'], kwargs['created_to'], kwargs['created_within'])
 
             if created_at_filter:
-                contracts = contracts.filter(created_at__icontains=created_at_filter)
+                contracts = filter_date_range(contracts, 'created_at', within=created_at_filter)
+
+            if kwargs['count'] or kwargs['group_by']:
+                # only the aggregate rows are displayed
+                CONTRACT_LISTING.write_summary(self.stdout, contracts, kwargs['group_by'], kwargs['format'])
+                return
 
             if contracts.exists():
-                self.print_Contract_details(contracts)
+                self.print_Contract_details(CONTRACT_LISTING.page(contracts, kwargs), kwargs)
             else:
                 self.stdout.write(self.style.SUCCESS("No Contract found."))
 
-    def print_Contract_details(self, contracts):
-        headers = ["ID", "Client", "Sales Rep", "Total Amount", "Amount Remaining", "Status", "Date of création"]
-        rows = []
-
-        for contract in contracts:
-            row = [contract.id, contract.client, contract.sales_rep, contract.total_amount,
-                   contract.amount_remaining, contract.status, contract.created_at]
-            rows.append(row)
-
-        title = "List of Contracts"
-        table = tabulate(rows, headers=headers, tablefmt="pretty")
-
-        # Utilisation d'une chaîne de format traditionnelle
-        table_with_title = "{}\n{}".format(title.center(len(table.split('\n')[0])), table)
-        print(table_with_title)
+    def print_Contract_details(self, page, options):
+        CONTRACT_LISTING.write(self.stdout, page, options['format'], options['columns'], stderr=self.stderr)
@@ -1,7 +1,8 @@
 from django.core.management.base import BaseCommand, CommandError
-from EpicEvents.models import Event, User
-from tabulate import tabulate
-from EpicEvents.permissions import get_user_id_from_token, require_login
+from EpicEvents.models import Event
+from EpicEvents.permissions import require_login
+from EpicEvents.listing import EVENT_LISTING, add_listing_arguments
+from EpicEvents.filters import PERIOD_HELP, filter_date_range, filter_number_range, filter_search
 
 
 class Command(BaseCommand):
@@ -13,9 +14,18 @@ class Command(BaseCommand):
         parser.add_argument('--name', type=str, help='Filter events by name', required=False)
         parser.add_argument('--start_date', type=str, help='Filter events by start date (format : YYYY-MM ou YYYY-MM-DD)', required=False)
         parser.add_argument('--end_date', type=str, help='Filter events by end date (format : YYYY-MM ou YYYY-MM-DD)', required=False)
+        parser.add_argument('--start-from', type=str, help=f'Filter events starting on or after ({PERIOD_HELP})', required=False)
+        parser.add_argument('--start-to', type=str, help=f'Filter events starting on or before ({PERIOD_HELP})', required=False)
+        parser.add_argument('--start-within', type=str, help='Filter events starting within a period (ex: this-month, next-30-days)', required=False)
+        parser.add_argument('--end-from', type=str, help=f'Filter events ending on or after ({PERIOD_HELP})', required=False)
+        parser.add_argument('--end-to', type=str, help=f'Filter events ending on or before ({PERIOD_HELP})', required=False)
         parser.add_argument('--support_staff', type=str, help='Filter events by support staff (name or ID)', required=False)
         parser.add_argument('--location', type=str, help='Filter events by  location', required=False)
+        parser.add_argument('--search', type=str, help='Full-text search in name, location and notes (best matches first)', required=False)
         parser.add_argument('--num_of_participants', type=str, help='Filter events by number of participants (ex: -50, +50, +100, +200)', required=False)
+        parser.add_argument('--min-attendees', type=int, help='Filter events with at least this number of participants', required=False)
+        parser.add_argument('--max-attendees', type=int, help='Filter events with at most this number of participants', required=False)
+        add_listing_arguments(parser, EVENT_LISTING)
 
     @require_login
     def handle(self, *args, **kwargs):
@@ -29,24 +39,17 @@ class Command(BaseCommand):
         participants_filter = kwargs['num_of_participants']
 
         if event_id is not None:
-            try:
-                event = Event.objects.get(pk=event_id)
-                self.print_event_details([event])
-            except Event.DoesNotExist:
-                self.stdout.write(self.style.ERROR(f"No event found with ID {event_id}."))
+            events = Event.objects.filter(pk=event_id)
+            if events.exists():
+                self.print_event_details(EVENT_LISTING.page(events, kwargs), kwargs)
+            else:
+                raise CommandError(f"No event found with ID {event_id}.")
         else:
-            user_id = get_user_id_from_token()
-            # Checking if the logged in user is a support_staff
-            try:
-                support_staff = User.objects.get(pk=user_id)
-                if support_staff.role == 'support':
-                    events = Event.objects.filter(support_staff=user_id)
-                else:
-                    events = Event.objects.all()
-
-            except User.DoesNotExist:
-                raise CommandError(f"User with id {user_id} does not exist or is not in role 'support'.")
+            # The support staff only list their own events
+            events = Event.objects.visible_to(kwargs['auth'].user)
 
+            if kwargs['search']:
+                events = filter_search(events, kwargs['search'])
 
             if contract_filter:
                 events = events.filter(contract__id=contract_filter)
@@ -54,11 +57,15 @@ class Command(BaseCommand):
             if name_filter:
                 events = events.filter(name__icontains=name_filter)
 
+            # date filters are compiled to ranges, so the indexes on start_date and end_date can be used
+            events = filter_date_range(events, 'start_date', kwargs['start_from'], kwargs['start_to'], kwargs['start_within'])
+            events = filter_date_range(events, 'end_date', kwargs['end_from'], kwargs['end_to'])
+
             if start_date_filter:
-                events = events.filter(start_date__icontains=start_date_filter)
+                events = filter_date_range(events, 'start_date', within=start_date_filter)
 
             if end_date_filter:
-                events = events.filter(end_date__icontains=end_date_filter)
+                events = filter_date_range(events, 'end_date', within=end_date_filter)
 
             if support_filter:
                 try:
@@ -70,6 +77,8 @@ class Command(BaseCommand):
             if location_filter:
                 events = events.filter(location__icontains=location_filter)
 
+            events = filter_number_range(events, 'attendees', kwargs['min_attendees'], kwargs['max_attendees'])
+
             if participants_filter:
                 # filter events based on number of participants
                 if participants_filter == '-50':
@@ -81,33 +90,15 @@ class Command(BaseCommand):
                 elif participants_filter == '+200':
                     events = events.filter(attendees__gte=200)
 
+            if kwargs['count'] or kwargs['group_by']:
+                # only the aggregate rows are displayed
+                EVENT_LISTING.write_summary(self.stdout, events, kwargs['group_by'], kwargs['format'])
+                return
+
             if events.exists():
-                self.print_event_details(events)
+                self.print_event_details(EVENT_LISTING.page(events, kwargs), kwargs)
             else:
                 self.stdout.write(self.style.SUCCESS("No events found."))
 
-    def print_event_details(self, events):
-        headers = ["ID", "Contract", "Name", "Start Date", "End Date", "Support Staff",
-                   "Location", "Number of Participants", "Notes"]
-        rows = []
-
-        for event in events:
-            row = [
-                event.id,
-                event.contract,
-                event.name,
-                event.start_date,
-                event.end_date,
-                event.support_staff,
-                event.location,
-                event.attendees,
-                event.notes
-            ]
-            rows.append(row)
-
-        title = "List of Events"
-        table = tabulate(rows, headers=headers, tablefmt="pretty")
-
-        # Utilisation d'une chaîne de format traditionnelle
-        table_with_title = "{}\n{}".format(title.center(len(table.split('\n')[0])), table)
-        print(table_with_title)
+    def print_event_details(self, page, options):
+        EVENT_LISTING.write(self.stdout, page, options['format'], options['columns'], stderr=self.stderr)
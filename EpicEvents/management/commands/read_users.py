@@ -1,7 +1,7 @@
 from django.core.management.base import BaseCommand, CommandError
-from tabulate import tabulate
 from EpicEvents.models import User
 from EpicEvents.permissions import require_login
+from EpicEvents.listing import USER_LISTING, add_listing_arguments
 
 
 class Command(BaseCommand):
@@ -12,6 +12,7 @@ class Command(BaseCommand):
         parser.add_argument('--fullname', type=str, help='Filter users by fullname', required=False)
         parser.add_argument('--username', type=str, help='Filter users by username', required=False)
         parser.add_argument('--role', type=str, help='Filter users by role', required=False)
+        add_listing_arguments(parser, USER_LISTING)
 
     @require_login
     def handle(self, *args, **options):
@@ -21,10 +22,10 @@ class Command(BaseCommand):
         role_filter = options['role']
 
         if user_id is not None:
-            try:
-                user = User.objects.get(id=user_id)
-                self.print_users_details([user])
-            except User.DoesNotExist:
+            users = User.objects.filter(id=user_id)
+            if users.exists():
+                self.print_users_details(USER_LISTING.page(users, options), options)
+            else:
                 raise CommandError(f"user with ID {user_id} not found.")
         else:
             users = User.objects.all()
@@ -38,22 +39,10 @@ class Command(BaseCommand):
             if role_filter:
                 users = users.filter(role__icontains=role_filter)
 
-            if users:
-                self.print_users_details(users)
+            if users.exists():
+                self.print_users_details(USER_LISTING.page(users, options), options)
             else:
                 self.stdout.write(self.style.SUCCESS("No users found."))
 
-    def print_users_details(self, data):
-        headers = ["ID", "Full Name", "Username", "Role"]
-        rows = []
-
-        for item in data:
-            row = [item.id, item.fullname, item.username, item.role]
-            rows.append(row)
-
-        title = "List of users"
-        table = tabulate(rows, headers=headers, tablefmt="pretty")
-
-        # Utilisation d'une chaîne de format traditionnelle
-        table_with_title = "{}\n{}".format(title.center(len(table.split('\n')[0])), table)
-        self.stdout.write(table_with_title)
+    def print_users_details(self, page, options):
+        USER_LISTING.write(self.stdout, page, options['format'], options['columns'], stderr=self.stderr)
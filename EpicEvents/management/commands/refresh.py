@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from EpicEvents.auth_utils import refresh_session
+
+
+class Command(BaseCommand):
+    """A management command to extend the session of the logged in user without entering the password again.
+    The session can be extended until its refresh token expires, commands also extend it when their token expired."""
+
+    def handle(self, *args, **options):
+        token, expiration_time = refresh_session()
+
+        if token is None:
+            raise CommandError("The session cannot be extended. Please log in.")
+
+        expiration_time = timezone.localtime(expiration_time).strftime('%Y-%m-%d %H:%M')
+        self.stdout.write(self.style.SUCCESS(f"Session extended until {expiration_time}."))
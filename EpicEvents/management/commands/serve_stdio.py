@@ -0,0 +1,64 @@
+import io
+import json
+import sys
+from contextlib import redirect_stdout, redirect_stderr
+from django.core.management.base import BaseCommand, CommandError, OutputWrapper
+from EpicEvents.permissions import get_token_context
+from . import utils
+
+
+class Command(BaseCommand):
+    """A management command serving JSON-lines requests on stdin, for the programs driving the CRM. A request is
+    {"id": ..., "command": "read_events", "args": ["--format", "jsonl"], "token": "..."} and its response
+    {"id": ..., "ok": true, "exit": 0, "stdout": "...", "stderr": "...", "error": null}, on one line of stdout.
+    The requests run one after the other in this process, and the responses are written in the same order, so a
+    client can send several requests without waiting for their responses. Without a token, the request runs with
+    the session of the process, like manage.py."""
+
+    def handle(self, *args, **options):
+        requests, responses = sys.stdin, sys.stdout
+        self.session = utils.MenuSession()
+        # The commands cannot prompt, stdin carries the requests
+        with utils.prompts_disabled():
+            for line in requests:
+                if not line.strip():
+                    continue
+                responses.write(json.dumps(self.serve(line), default=str) + '\n')
+                responses.flush()
+
+    def serve(self, line):
+        # Response to a request line
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict) or not isinstance(request.get('command'), str):
+                raise ValueError("a request is an object with a command")
+            args = request.get('args', [])
+            if not isinstance(args, list):
+                raise ValueError("args is a list")
+        except ValueError as e:
+            return {'id': None, 'ok': False, 'exit': 1, 'stdout': '', 'stderr': '', 'error': f"Invalid request: {e}"}
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        response = {'id': request.get('id'), 'ok': False, 'exit': 1, 'error': None}
+        try:
+            # the help of --help is written by the parser on sys.stdout, it goes in the response too
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                name, command_options = self.session.parse_arguments([request['command'], *map(str, args)])
+                command, _, _ = self.session.get_command(name)
+                command.stdout, command.stderr = OutputWrapper(stdout), OutputWrapper(stderr)
+                if request.get('token'):
+                    self.session.call(name, get_token_context(request['token']), **command_options)
+                else:
+                    self.session.run(name, **command_options)
+            response.update(ok=True, exit=0)
+        except EOFError:
+            response['error'] = f"{request['command']} asks for input, give all its options"
+        except CommandError as e:
+            response.update(exit=e.returncode, error=str(e))
+        except SystemExit as e:
+            # --help
+            response.update(ok=e.code in (0, None), exit=e.code if isinstance(e.code, int) else 0)
+        except Exception as e:
+            response['error'] = f"{e.__class__.__name__}: {e}"
+        response.update(stdout=stdout.getvalue(), stderr=stderr.getvalue())
+        return response
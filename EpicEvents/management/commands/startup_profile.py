@@ -0,0 +1,90 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from django.conf import settings
+from django.core.management import get_commands
+from django.core.management.base import BaseCommand, CommandError
+from EpicEvents.listing import TableWriter
+
+# Script run in a fresh interpreter: times django.setup() and the import of a command module
+PROFILE_SCRIPT = """
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'EpicEventsCRM.settings')
+start = time.perf_counter()
+import django
+django.setup()
+setup_time = time.perf_counter() - start
+command_time = 0
+if sys.argv[1]:
+    from django.core.management import get_commands, load_command_class
+    start = time.perf_counter()
+    load_command_class(get_commands()[sys.argv[1]], sys.argv[1])
+    command_time = time.perf_counter() - start
+print(json.dumps({'setup': setup_time, 'command': command_time}))
+"""
+
+
+def parse_import_times(lines):
+    # Parses the "import time: self [us] | cumulative | imported package" lines written by -X importtime.
+    # Returns the (module, self time in microseconds) pairs, in import order.
+    modules = []
+    for line in lines:
+        if not line.startswith('import time:'):
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        if self_time.strip().isdigit():
+            modules.append((name.strip(), int(self_time)))
+    return modules
+
+
+def aggregate_import_times(modules, by='package'):
+    # Total import time and number of modules, by top-level package or by module, slowest first
+    totals = defaultdict(lambda: [0, 0])
+    for name, self_time in modules:
+        key = name.split('.')[0] if by == 'package' else name
+        totals[key][0] += self_time
+        totals[key][1] += 1
+    return sorted(((key, time, count) for key, (time, count) in totals.items()), key=lambda total: -total[1])
+
+
+class Command(BaseCommand):
+    """A management command reporting the start-up cost of the commands: the import time of the modules,
+    aggregated by package, and the time of django.setup(). It is measured in a fresh interpreter, like a new
+    manage.py invocation."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('command', nargs='?', default='', help='Command whose module is also imported')
+        parser.add_argument('--by', choices=['package', 'module'], default='package',
+                            help='Aggregate the import times by top-level package or by module')
+        parser.add_argument('--top', type=int, default=15, help='Number of packages or modules displayed')
+
+    def handle(self, *args, **options):
+        if options['command'] and options['command'] not in get_commands():
+            raise CommandError(f"Unknown command: {options['command']}")
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT, options['command']],
+            cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError("The profiled interpreter failed:\n" + '\n'.join(errors))
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        modules = parse_import_times(result.stderr.splitlines())
+        totals = aggregate_import_times(modules, options['by'])
+
+        headers = ['Package' if options['by'] == 'package' else 'Module', 'Modules', 'Import time (ms)']
+        rows = [[key, count, f"{time / 1000:.1f}"] for key, time, count in totals[:options['top']]]
+        table = TableWriter(self.stdout, headers, rows)
+        table.write_title("Import time")
+        table.write_header()
+        for row in rows:
+            table.write_row(row)
+        table.write_footer()
+
+        self.stdout.write(f"Modules imported: {len(modules)}, total import time: "
+                          f"{sum(time for _, time in modules) / 1000:.1f} ms")
+        self.stdout.write(f"django.setup() (settings, apps and their imports): {timings['setup'] * 1000:.1f} ms")
+        if options['command']:
+            self.stdout.write(f"Import of the {options['command']} command: {timings['command'] * 1000:.1f} ms")
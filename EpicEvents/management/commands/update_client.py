@@ -1,5 +1,4 @@
 from django.core.management.base import BaseCommand
-from EpicEvents.models import Client
 from EpicEvents.permissions import require_login, is_sales_team_and_client_rep
 
 
@@ -18,19 +17,17 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         client_id = kwargs['client_id']
 
-        try:
-            client = Client.objects.get(pk=client_id)
+        # The client, loaded by is_sales_team_and_client_rep
+        client = kwargs['client']
 
-            if kwargs['fullname']:
-                client.fullname = kwargs['fullname']
-            if kwargs['email']:
-                client.email = kwargs['email']
-            if kwargs['phone']:
-                client.phone = kwargs['phone']
-            if kwargs['company_name']:
-                client.company_name = kwargs['company_name']
+        if kwargs['fullname']:
+            client.fullname = kwargs['fullname']
+        if kwargs['email']:
+            client.email = kwargs['email']
+        if kwargs['phone']:
+            client.phone = kwargs['phone']
+        if kwargs['company_name']:
+            client.company_name = kwargs['company_name']
 
-            client.save()
-            self.stdout.write(self.style.SUCCESS(f"Client with ID {client_id} modified successfully."))
-        except Client.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f"Client with ID {client_id} does not exist."))
+        client.save()
+        self.stdout.write(self.style.SUCCESS(f"Client with ID {client_id} modified successfully."))
@@ -1,4 +1,4 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from EpicEvents.models import Contract, User
 from EpicEvents.permissions import require_login, is_contract_sales_rep_or_is_management_team
 
@@ -19,22 +19,18 @@ class Command(BaseCommand):
         contract_id = kwargs['contract_id']
         total_amount = kwargs['total_amount']
         amount_remaining = kwargs['amount_remaining']
-        status = kwargs['status'].lower()
+        status = (kwargs['status'] or '').lower()
         sales_rep_id = kwargs['sales_rep_id']
 
-        try:
-            contract = Contract.objects.get(pk=contract_id)
-        except Contract.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f"Contract with ID {contract_id} does not exist."))
-            return
+        # The contract, loaded by is_contract_sales_rep_or_is_management_team
+        contract = kwargs['contract']
 
         if sales_rep_id != None and sales_rep_id != '':
             try:
                 sales_rep = User.objects.get(pk=sales_rep_id, role='sales')
                 contract.sales_rep = sales_rep
             except User.DoesNotExist:
-                self.stdout.write(self.style.ERROR("The user with the specified ID does not exist or != a member of sales team."))
-                return
+                raise CommandError("The user with the specified ID does not exist or != a member of sales team.")
 
         if total_amount != None and total_amount != '':
             contract.total_amount = total_amount
@@ -45,8 +41,7 @@ class Command(BaseCommand):
         if status != None and status != '':
             valid_status = [choice[0] for choice in Contract.STATUS_CHOICES]
             if status not in valid_status:
-                self.stdout.write(self.style.ERROR(f"Status '{status}' is invalid. Use any of the following: {', '.join(valid_status)}"))
-                return
+                raise CommandError(f"Status '{status}' is invalid. Use any of the following: {', '.join(valid_status)}")
             contract.status = status
 
         contract.save()
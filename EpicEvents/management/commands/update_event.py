@@ -1,5 +1,5 @@
-from django.core.management.base import BaseCommand
-from EpicEvents.models import Event, User
+from django.core.management.base import BaseCommand, CommandError
+from EpicEvents.models import User
 from datetime import datetime
 from EpicEvents.permissions import require_login, is_event_support_or_is_management_team
 
@@ -29,11 +29,8 @@ class Command(BaseCommand):
         notes = kwargs['notes']
         support_staff_id = kwargs['support_staff_id']
 
-        try:
-            event = Event.objects.get(pk=event_id)
-        except Event.DoesNotExist:
-            self.stdout.write(self.style.ERROR(f"Event with ID {event_id} does not exist."))
-            return
+        # The event, loaded by is_event_support_or_is_management_team
+        event = kwargs['event']
 
         if name and name != '':
             event.name = name
@@ -60,8 +57,7 @@ class Command(BaseCommand):
                 support_staff = User.objects.get(pk=support_staff_id, role='support')
                 event.support_staff = support_staff
             except User.DoesNotExist:
-                self.stdout.write(self.style.ERROR("user with the specified ID does not exist or != a support team member."))
-                return
+                raise CommandError("user with the specified ID does not exist or != a support team member.")
 
         event.save()
 
@@ -1,6 +1,7 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from EpicEvents.models import User
 from EpicEvents.permissions import require_login, is_management_team
+from EpicEvents.auth_utils import revoke_tokens
 
 
 class Command(BaseCommand):
@@ -34,6 +35,11 @@ class Command(BaseCommand):
                 user.username = new_username
 
             user.save()
+
+            if fullname or role or new_username:
+                # the tokens already issued to the user carry the old role and names
+                revoke_tokens(user)
+
             self.stdout.write(self.style.SUCCESS(f"user with ID {user_id} modified successfully"))
         except User.DoesNotExist:
-            self.stderr.write(self.style.ERROR(f"user with ID {user_id} not found"))
+            raise CommandError(f"user with ID {user_id} not found")
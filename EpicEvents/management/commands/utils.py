@@ -1,5 +1,85 @@
+import argparse
+import getpass
+import io
+import sys
+from contextlib import contextmanager
 from django.core.management.base import CommandError
-from django.core.management import call_command
+from django.core.management import get_commands, load_command_class
+from EpicEvents.permissions import get_login_context
+
+SCRIPT_EXCLUDED_COMMANDS = ('login', 'execute', 'crm_server', 'serve_stdio') # Commands using the terminal or running other commands
+
+
+def prompt_unavailable(prompt=''):
+    # Replaces getpass.getpass while the prompts are disabled, getpass reads the terminal and not sys.stdin
+    raise EOFError(prompt)
+
+
+@contextmanager
+def prompts_disabled():
+    # input() and getpass() raise EOFError, for the commands that cannot ask for the missing values
+    stdin, ask_password = sys.stdin, getpass.getpass
+    sys.stdin, getpass.getpass = io.StringIO(), prompt_unavailable
+    try:
+        yield
+    finally:
+        sys.stdin, getpass.getpass = stdin, ask_password
+
+
+class MenuSession:
+    # State of an interactive session of the execute menu. The command objects, the default values of their
+    # options and the AuthContext are built once, so a menu action is a direct call of the command's execute()
+    # (without the system checks) instead of call_command() resolving the command, building its parser and
+    # reading the token again.
+    def __init__(self):
+        self.commands = {} # Command objects, parsers and default options, by command name
+        self.auth = None # AuthContext of the logged in user, kept until its token expires
+
+    def get_command(self, name):
+        if name not in self.commands:
+            command = load_command_class(get_commands()[name], name)
+            parser = command.create_parser('manage.py', name)
+            defaults = {action.dest: action.default for action in parser._actions
+                        if action.dest != 'help' and action.default is not argparse.SUPPRESS}
+            self.commands[name] = (command, parser, defaults)
+        return self.commands[name]
+
+    def run(self, name, **options):
+        # Runs the command as the logged in user of the session
+        try:
+            self.auth = get_login_context(self.auth)
+        except CommandError:
+            # the commands requiring a login raise the error themselves
+            self.auth = None
+        return self.call(name, self.auth, **options)
+
+    def call(self, name, auth, **options):
+        # Runs the command with the given AuthContext. execute() is traced when Sentry is set up
+        # (EpicEventsCRM.tracing), the commands of a script or of serve_stdio have their own transaction
+        command, _, defaults = self.get_command(name)
+        return command.execute(**{**defaults, **options, 'auth': auth, 'skip_checks': True})
+
+    def parse_arguments(self, argv):
+        # Name and options of a command line (command name and arguments), parsed like manage.py does
+        name, *args = argv
+        if name not in get_commands():
+            raise CommandError(f"Unknown command: {name}")
+        if name in SCRIPT_EXCLUDED_COMMANDS:
+            raise CommandError(f"{name} cannot be run from a script")
+        _, parser, _ = self.get_command(name)
+        # the parser raises a CommandError for invalid arguments
+        return name, vars(parser.parse_args(args))
+
+    def run_line(self, argv):
+        # Runs a command line of a script
+        name, options = self.parse_arguments(argv)
+        return self.run(name, **options)
+
+    def logout(self):
+        # logout only deletes the token, it needs no login check
+        self.auth = None
+        command, _, defaults = self.get_command('logout')
+        command.handle(**defaults)
 
 
 def contract_update_input():
@@ -47,7 +127,7 @@ def user_update_input():
 
 def create_user(self):
     try:
-        call_command('create_new_user')
+        self.session.run('create_new_user')
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -59,17 +139,17 @@ def view_users(self):
     user_id = input('Enter ID to view a single user or leave blank to view all users: ')
     if user_id:
         try:
-            call_command('read_users', int(user_id))
+            self.session.run('read_users', user_id=int(user_id))
         except CommandError as e:
             self.stdout.write(self.style.ERROR(e))
     else:
-        call_command('read_users')
+        self.session.run('read_users')
 
 def update_user(self):
     try:
         user_id = input("Enter user id to be updated(int): ")
         fullname, new_username, role = user_update_input()
-        call_command('update_user', int(user_id), fullname=fullname, username=new_username, role=role)
+        self.session.run('update_user', user_id=int(user_id), fullname=fullname, username=new_username, role=role)
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -79,7 +159,7 @@ def delete_user(self):
     # enter client id
     user_id = input('Enter ID  of user to be deleted: ')
     try:
-        call_command('delete_user', int(user_id))
+        self.session.run('delete_user', user_id=int(user_id))
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -88,7 +168,7 @@ def delete_user(self):
 
 def create_client(self):
     try:
-        call_command('create_client')
+        self.session.run('create_client')
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -99,18 +179,18 @@ def view_client(self):
     client_id = input('Enter ID to view a single client or leave blank to view all clients: ')
     if client_id:
         try:
-            call_command('read_clients', int(client_id))
+            self.session.run('read_clients', client_id=int(client_id))
         except CommandError as e:
             self.stdout.write(self.style.ERROR(e))
     else:
-        call_command('read_clients')
+        self.session.run('read_clients')
 
 def update_client(self):
     # enter client id
     client_id = input('Enter client id: ')
     fullname, phone, email, company_name = client_update_input()
     try:
-        call_command('update_client', int(client_id), fullname=fullname, phone=phone, email=email, company_name=company_name)
+        self.session.run('update_client', client_id=int(client_id), fullname=fullname, phone=phone, email=email, company_name=company_name)
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -120,7 +200,7 @@ def delete_client(self):
     # enter client id
     client_id = input('Enter client id: ')
     try:
-        call_command('delete_client', int(client_id))
+        self.session.run('delete_client', client_id=[int(client_id)])
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -129,7 +209,7 @@ def delete_client(self):
 
 def create_contract(self):
     try:
-        call_command('create_contract')
+        self.session.run('create_contract')
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -140,18 +220,18 @@ def view_contract(self):
     contract_id = input('Enter ID to view a single contract or leave blank to view all contracts: ')
     if contract_id:
         try:
-            call_command('read_contracts', int(contract_id))
+            self.session.run('read_contracts', contract_id=int(contract_id))
         except CommandError as e:
             self.stdout.write(self.style.ERROR(e))
     else:
-        call_command('read_contracts')
+        self.session.run('read_contracts')
 
 def update_contract(self):
     # enter event id
     contract_id = input('Enter ID of contract: ')
     total_amount, amount_remaining, status, sales_rep_id = contract_update_input()
     try:
-        call_command('update_contract', int(contract_id), total_amount=total_amount, amount_remaining=amount_remaining, status=status, sales_rep_id=sales_rep_id)
+        self.session.run('update_contract', contract_id=int(contract_id), total_amount=total_amount, amount_remaining=amount_remaining, status=status, sales_rep_id=sales_rep_id)
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -161,7 +241,7 @@ def delete_contract(self):
     # enter contract id
     contract_id = input('Enter id of contract to be deleted: ')
     try:
-        call_command('delete_contract', int(contract_id))
+        self.session.run('delete_contract', contract_id=int(contract_id))
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -170,7 +250,7 @@ def delete_contract(self):
 
 def new_event(self):
     try:
-        call_command('create_event')
+        self.session.run('create_event')
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -181,18 +261,18 @@ def view_event(self):
     event_id = input('Enter ID to view a single event or leave blank to view all events: ')
     if event_id:
         try:
-            call_command('read_events', int(event_id))
+            self.session.run('read_events', event_id=int(event_id))
         except CommandError as e:
             self.stdout.write(self.style.ERROR(e))
     else:
-        call_command('read_events')
+        self.session.run('read_events')
 
 def update_evenvt(self):
     # enter event id
     event_id = input('Enter ID of event to be updated: ')
     name, start_date, end_date, location, num_of_participants, notes, support_staff_id = event_update_input()
     try:
-        call_command('update_event', int(event_id), name=name, start_date=start_date, end_date=end_date, location=location, num_of_participants=num_of_participants, notes=notes, support_staff_id=support_staff_id)
+        self.session.run('update_event', event_id=int(event_id), name=name, start_date=start_date, end_date=end_date, location=location, num_of_participants=num_of_participants, notes=notes, support_staff_id=support_staff_id)
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -202,7 +282,7 @@ def delete_event(self):
     # enter event id
     event_id = input('Enter ID of event to be deleted: ')
     try:
-        call_command('delete_event', int(event_id))
+        self.session.run('delete_event', event_id=[int(event_id)])
     except CommandError as e:
         self.stdout.write(self.style.ERROR(e))
     except ValueError as e:
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EpicEvents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contract',
+            name='created_at',
+            field=models.DateField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='end_date',
+            field=models.DateField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='start_date',
+            field=models.DateField(db_index=True),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EpicEvents', '0002_alter_contract_created_at_alter_event_end_date_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['sales_rep', 'status'], name='contract_salesrep_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['status', 'created_at'], name='contract_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['support_staff', 'start_date'], name='event_support_start_idx'),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:31
+
+import EpicEvents.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Tables indexed for full-text search: (table, FTS5 table, indexed columns)
+SEARCH_INDEXES = [
+    ('EpicEvents_event', 'EpicEvents_event_fts', ['name', 'location', 'notes']),
+    ('EpicEvents_client', 'EpicEvents_client_fts', ['fullname', 'email', 'company_name']),
+]
+
+
+def search_index_sql(table, fts_table, columns):
+    # External content FTS5 table, kept in sync with its table by triggers
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5({names}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER {fts_table}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER {fts_table}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER {fts_table}_update AFTER UPDATE OF {names} ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        # Index the rows created before the migration
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    # FTS5 is specific to SQLite, other databases are left without full-text index
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, fts_table, columns in SEARCH_INDEXES:
+        for sql in search_index_sql(table, fts_table, columns):
+            schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, fts_table, columns in SEARCH_INDEXES:
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EpicEvents', '0003_contract_contract_salesrep_status_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientSearch',
+            fields=[
+                ('client', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='EpicEvents.client')),
+                ('fullname', models.TextField()),
+                ('email', models.TextField()),
+                ('company_name', models.TextField()),
+                ('match', EpicEvents.models.SearchField(db_column='EpicEvents_client_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'EpicEvents_client_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='EventSearch',
+            fields=[
+                ('event', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search', serialize=False, to='EpicEvents.event')),
+                ('name', models.TextField()),
+                ('location', models.TextField()),
+                ('notes', models.TextField()),
+                ('match', EpicEvents.models.SearchField(db_column='EpicEvents_event_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'EpicEvents_event_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
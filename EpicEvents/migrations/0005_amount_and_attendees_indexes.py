@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EpicEvents', '0004_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['total_amount'], name='contract_total_amount_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contract',
+            index=models.Index(fields=['amount_remaining'], name='contract_remaining_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['attendees'], name='event_attendees_idx'),
+        ),
+    ]
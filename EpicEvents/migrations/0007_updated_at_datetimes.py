@@ -0,0 +1,43 @@
+# Generated by Django 5.0.2 on 2026-10-18 15:40
+
+import django.utils.timezone
+from importlib import import_module
+from django.db import migrations, models
+
+# SQLite rebuilds the event and client tables to change their columns, which drops the triggers of their full-text
+# search indexes: the indexes are dropped before the changes and created again after them
+search_indexes = import_module('EpicEvents.migrations.0004_search_indexes')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EpicEvents', '0006_user_token_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(search_indexes.drop_search_indexes, search_indexes.create_search_indexes),
+        migrations.AddField(
+            model_name='event',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='contract',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.RunPython(search_indexes.create_search_indexes, search_indexes.drop_search_indexes),
+    ]
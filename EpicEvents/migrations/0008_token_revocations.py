@@ -0,0 +1,20 @@
+# Generated by Django 5.0.2 on 2026-10-18 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EpicEvents', '0007_updated_at_datetimes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('user_id', models.PositiveBigIntegerField(primary_key=True, serialize=False)),
+                ('token_version', models.PositiveIntegerField()),
+            ],
+        ),
+    ]
@@ -1,6 +1,7 @@
 # Importing necessary classes from django.db and django.contrib.auth.models
 from django.db import models # Importing models from django.db
 from django.contrib.auth.models import AbstractUser # Importing AbstractUser from django.contrib.auth.models
+from django.db.models import Lookup # Importing Lookup to define the full-text MATCH operator
 
 # Definition of custom User model, extending AbstractUser to include additional fields
 class User(AbstractUser):
@@ -17,11 +18,32 @@ class User(AbstractUser):
     fullname = models.CharField(max_length=255, unique=True) # Full name of the user
     username = models.CharField(max_length=150, unique=True) # Username of the user
     role = models.CharField(max_length=20, choices=ROLE_CHOICES) # Role of the user
+    token_version = models.PositiveIntegerField(default=0) # Incremented to revoke the tokens issued to the user
+    updated_at = models.DateTimeField(auto_now=True, db_index=True) # Read by the completion index refresh
 
     # Human-readable representation of the User object
     def __str__(self):
         return self.username # Return the username of the user
 
+# Token versions of the users whose tokens were revoked. The table has no foreign key to the users, so the tokens of a
+# deleted user stay refused on every host until they expire
+class TokenRevocation(models.Model):
+    user_id = models.PositiveBigIntegerField(primary_key=True) # ID of the user, deleted or not
+    token_version = models.PositiveIntegerField() # The tokens issued with a lower version are refused
+
+# Row-level rules of the Client model, expressed as SQL predicates
+class ClientQuerySet(models.QuerySet):
+    def owned_by(self, user): # Clients the user is the sales rep of
+        return self.filter(sales_rep_id=user.pk)
+
+    def visible_to(self, user): # Every employee can read the clients
+        return self.all()
+
+    def editable_by(self, user): # Only the sales rep of a client can modify it
+        if user.role == 'sales':
+            return self.owned_by(user)
+        return self.none()
+
 # Definition of Client model to store client information
 class Client(models.Model):
     # Link to a User model instance, nullable, cascading delete
@@ -33,13 +55,30 @@ class Client(models.Model):
     company_name = models.CharField(max_length=255)
     # Automatically set when a new client is created
     created_at = models.DateTimeField(auto_now_add=True)
-    # Automatically updated whenever a client is saved
-    updated_at = models.DateField(auto_now=True)
+    # Automatically updated whenever a client is saved, the completion index is refreshed from it
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    objects = ClientQuerySet.as_manager() # Client.objects.owned_by(user), visible_to(user) and editable_by(user)
 
     # Human-readable representation of the Client object
     def __str__(self):
         return self.fullname # Return the full name of the client
     
+# Row-level rules of the Contract model, expressed as SQL predicates
+class ContractQuerySet(models.QuerySet):
+    def owned_by(self, user): # Contracts the user is the sales rep of
+        return self.filter(sales_rep_id=user.pk)
+
+    def visible_to(self, user): # Every employee can read the contracts
+        return self.all()
+
+    def editable_by(self, user): # The management team can modify every contract, a sales rep only their own
+        if user.role == 'management':
+            return self.all()
+        if user.role == 'sales':
+            return self.owned_by(user)
+        return self.none()
+
 # Definition of Contract model to store contracts associated with clients and users
 class Contract(models.Model):
     # Status choices defined for the Contract model
@@ -60,8 +99,20 @@ class Contract(models.Model):
     total_amount = models.FloatField(null=False) # Total amount of the contract
     amount_remaining = models.FloatField(null=False) # Amount remaining to be paid
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="waiting for signature") # Status of the contract
-    created_at = models.DateField(auto_now_add=True) # Automatically set when a new contract is created
-    updated_at = models.DateField(auto_now=True) # Automatically updated whenever a contract is saved
+    created_at = models.DateField(auto_now_add=True, db_index=True) # Automatically set when a new contract is created
+    updated_at = models.DateTimeField(auto_now=True, db_index=True) # Automatically updated whenever a contract is saved
+
+    objects = ContractQuerySet.as_manager() # Contract.objects.owned_by(user), visible_to(user) and editable_by(user)
+
+    class Meta:
+        # Composite indexes for the permission checks and the filters of read_contracts
+        indexes = [
+            models.Index(fields=['sales_rep', 'status'], name='contract_salesrep_status_idx'),
+            models.Index(fields=['status', 'created_at'], name='contract_status_created_idx'),
+            # Amount ranges of read_contracts
+            models.Index(fields=['total_amount'], name='contract_total_amount_idx'),
+            models.Index(fields=['amount_remaining'], name='contract_remaining_idx'),
+        ]
 
     # Custom save method to assign sales_rep from client if not set
     def save(self, *args, **kwargs): # Custom save method to assign sales_rep from client if not set
@@ -73,20 +124,91 @@ class Contract(models.Model):
     def __str__(self): 
         return f"Contract {self.id} - {self.client}" # Return the contract ID and client name
 
+# Row-level rules of the Event model, expressed as SQL predicates
+class EventQuerySet(models.QuerySet):
+    def owned_by(self, user): # Events the user is the support staff of
+        return self.filter(support_staff_id=user.pk)
+
+    def visible_to(self, user): # The support team only lists its own events, the other employees list them all
+        if user.role == 'support':
+            return self.owned_by(user)
+        return self.all()
+
+    def editable_by(self, user): # The management team can modify every event, the support staff only their own
+        if user.role == 'management':
+            return self.all()
+        if user.role == 'support':
+            return self.owned_by(user)
+        return self.none()
+
 # Definition of Event model to store events related to contracts
 class Event(models.Model):
     # Link to a Contract model instance, cascading delete
     contract = models.ForeignKey(Contract, on_delete=models.CASCADE) 
     # Additional fields for the Event model
     name = models.CharField(max_length=255) # Name of the event
-    start_date = models.DateField(null=False) # Start date of the event
-    end_date = models.DateField(null=False) # End date of the event
+    start_date = models.DateField(null=False, db_index=True) # Start date of the event
+    end_date = models.DateField(null=False, db_index=True) # End date of the event
     # Link to a User model instance, deletion protected
     support_staff = models.ForeignKey(User, on_delete=models.PROTECT) # Link to a User model instance
     location = models.CharField(max_length=255) # Location of the event
     attendees = models.IntegerField() # Number of attendees
     notes = models.TextField() # Additional notes for the event
+    updated_at = models.DateTimeField(auto_now=True, db_index=True) # Read by the completion index refresh
+
+    objects = EventQuerySet.as_manager() # Event.objects.owned_by(user), visible_to(user) and editable_by(user)
+
+    class Meta:
+        # Events of a support staff, ordered by date, are read without sorting
+        indexes = [
+            models.Index(fields=['support_staff', 'start_date'], name='event_support_start_idx'),
+            # Attendees ranges of read_events
+            models.Index(fields=['attendees'], name='event_attendees_idx'),
+        ]
 
     # Human-readable representation of the Event object
     def __str__(self):
         return f"Event {self.id} - {self.name}" # Return the event ID and name
+
+
+# Field holding the FTS5 hidden column named after its table, used on the left of the MATCH operator
+class SearchField(models.TextField):
+    pass
+
+# Full-text lookup: filter(search__match=query) compiles to "<fts table> MATCH <query>"
+@SearchField.register_lookup
+class Match(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", lhs_params + rhs_params
+
+# Full-text index of the events, an SQLite FTS5 table kept up to date by triggers (see migration 0004)
+# Altering a field of Event or Client makes SQLite rebuild the table and drop these triggers:
+# prefer Meta.indexes to db_index, or recreate the triggers in the migration
+class EventSearch(models.Model):
+    event = models.OneToOneField(Event, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search')
+    name = models.TextField()
+    location = models.TextField()
+    notes = models.TextField()
+    match = SearchField(db_column='EpicEvents_event_fts') # Searches every column of the index
+    rank = models.FloatField() # BM25 score of the match, lower is better
+
+    class Meta:
+        managed = False
+        db_table = 'EpicEvents_event_fts'
+
+# Full-text index of the clients, an SQLite FTS5 table kept up to date by triggers (see migration 0004)
+class ClientSearch(models.Model):
+    client = models.OneToOneField(Client, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', related_name='search')
+    fullname = models.TextField()
+    email = models.TextField()
+    company_name = models.TextField()
+    match = SearchField(db_column='EpicEvents_client_fts') # Searches every column of the index
+    rank = models.FloatField() # BM25 score of the match, lower is better
+
+    class Meta:
+        managed = False
+        db_table = 'EpicEvents_client_fts'
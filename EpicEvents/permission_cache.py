@@ -0,0 +1,72 @@
+# Description: This file contains the cache of the permission decisions taken by the permission decorators.
+import time
+from collections import OrderedDict
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from EpicEvents.models import Client, Contract, Event, User
+
+PERMISSION_CACHE_SIZE = 1024 # Number of decisions kept, the least recently used ones are dropped first
+PERMISSION_CACHE_TTL = 60 # Seconds the reason of a refusal (denied or missing) is trusted, the changes made by other processes send no signal here
+
+ALLOWED = 'allowed'
+DENIED = 'denied'
+MISSING = 'missing'
+
+
+class PermissionCache:
+    # LRU cache of the decisions (allowed, denied or missing) keyed by (action, model, object ID, user ID, role).
+    # It lives as long as the process, so the execute menu loop does not look up twice why an object is refused.
+    # The permission itself is always checked by the database (see permissions.check_object_permissions).
+    def __init__(self, size=PERMISSION_CACHE_SIZE, ttl=PERMISSION_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self.decisions = OrderedDict()
+
+    @staticmethod
+    def key(action, model, object_id, auth):
+        return (action, model._meta.label, object_id, auth.user_id, auth.role)
+
+    def get(self, action, model, object_id, auth):
+        key = self.key(action, model, object_id, auth)
+        decision, expires_at = self.decisions.get(key, (None, 0))
+        if decision is None or expires_at < time.monotonic():
+            self.decisions.pop(key, None)
+            return None
+        self.decisions.move_to_end(key)
+        return decision
+
+    def set(self, action, model, object_id, auth, decision):
+        key = self.key(action, model, object_id, auth)
+        self.decisions[key] = (decision, time.monotonic() + self.ttl)
+        self.decisions.move_to_end(key)
+        while len(self.decisions) > self.size:
+            self.decisions.popitem(last=False)
+
+    def invalidate(self, label=None, object_id=None, user_id=None):
+        # Drop the decisions about an object, or the decisions taken for a user
+        for key in list(self.decisions):
+            _, key_label, key_object_id, key_user_id, _ = key
+            if (label == key_label and object_id == key_object_id) or (user_id is not None and user_id == key_user_id):
+                del self.decisions[key]
+
+    def clear(self):
+        self.decisions.clear()
+
+
+permission_cache = PermissionCache()
+
+
+# Every save or deletion invalidates the decisions: a new object replaces a missing one, and a change of
+# Client.sales_rep, Contract.sales_rep or Event.support_staff moves the ownership.
+# QuerySet.update() sends no signal, it must not be used on these fields.
+@receiver([post_save, post_delete], sender=Client)
+@receiver([post_save, post_delete], sender=Contract)
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_object_decisions(sender, instance, **kwargs):
+    permission_cache.invalidate(label=sender._meta.label, object_id=instance.pk)
+
+
+# A change of User.role (or a deleted user) invalidates the decisions taken for the user
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_decisions(sender, instance, **kwargs):
+    permission_cache.invalidate(user_id=instance.pk)
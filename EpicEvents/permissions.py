@@ -1,53 +1,106 @@
 # Description: This file contains the custom permissions that are used to restrict access to certain views based on the user's role.
 from django.core.management.base import CommandError # Importing CommandError from django.core.management.base
-from EpicEvents.auth_utils import load_token, validate_token # Importing load_token and validate_token from epicevents.auth_utils
-import json
+from EpicEvents.auth_utils import load_token, load_session, refresh_session, validate_token, token_expiration_time # Importing the token helpers from epicevents.auth_utils
+from EpicEvents.auth_utils import get_token_file_path, load_revocations
+import os
 from functools import wraps
+from datetime import datetime, timezone
+from django.db import transaction
 from EpicEvents.models import Client, Contract, Event, User
+from EpicEvents.permission_cache import permission_cache, ALLOWED, DENIED, MISSING
+
+
+class AuthContext:
+    # Authentication of the running command: the token of the session and the user it was issued to.
+    # It is built once by require_login and passed to the permission decorators and to handle() as kwargs['auth'].
+    def __init__(self, user=None, token=None, expiration_time=None, claims=None, token_file=None):
+        self.user = user # Logged in user, built from the claims of the token (unsaved, it must never be saved)
+        self.token = token # Encoded token
+        self.expiration_time = expiration_time # Expiration time of the token
+        self.claims = claims or {} # Claims used when no user is loaded (decorators used without require_login)
+        self.token_file = token_file # Token file of the session the token was read from, None for a token given by the caller
+
+    @property
+    def user_id(self):
+        return self.user.id if self.user is not None else self.claims.get('user_id', '')
+
+    @property
+    def role(self):
+        return self.user.role if self.user is not None else self.claims.get('user_role', '')
+
+
+def get_auth_context(kwargs):
+    # AuthContext built by require_login, or read from the token file when a decorator is used on its own
+    auth = kwargs.get('auth')
+    if auth is None:
+        auth = AuthContext(claims={'user_id': get_user_id_from_token(), 'user_role': get_user_role_from_token()})
+    return auth
+
+
+def get_login_context(auth=None):
+    # AuthContext of the logged in user. An AuthContext kept by a long-lived session (the execute menu) is reused
+    # until its token expires, is revoked or the session logs out, otherwise the token is read from the token file of
+    # the session and validated.
+    if auth is not None and auth.expiration_time is not None and auth.expiration_time > datetime.now(timezone.utc):
+        # The cached revocations and the presence of the token file are checked, the token is not read and verified
+        # again
+        if auth.user is not None and auth.user.token_version >= load_revocations().get(str(auth.user.id), 0) \
+                and (auth.token_file is None or os.path.exists(auth.token_file)):
+            return auth
+
+    token = load_token() # Load the token from the token file of the session
+
+    if token[0] is None:
+        raise CommandError("User not logged in. Please log in.")
+    
+    user = validate_token(token) # Validate the token
 
+    if user is None:
+        # The session is silently extended with its refresh token, without asking the password again
+        token = refresh_session()
+        user = validate_token(token) if token[0] else None
 
-def require_login(command_func): 
-    # function to ensur the user is logged in
-    def wrapper(*args, **kwargs): # Definition of wrapper function
-        token = load_token() # Load the token from the .token file
+    if user is None:
+        raise CommandError("Invalid token. Please log in.")
+
+    return AuthContext(user, *token, token_file=get_token_file_path())
 
-        if token[0] is None:
-            raise CommandError("User not logged in. Please log in.")
-        
-        user = validate_token(token) # Validate the token
 
-        if user is None:
-            raise CommandError("Invalid token. Please log in.")
+def get_token_context(token):
+    # AuthContext of a token given by the caller (serve_stdio requests) instead of the token file of the session.
+    # The token is validated on every call, so a revoked token is refused as soon as the revocations are reloaded.
+    expiration_time = token_expiration_time(token)
+    user = validate_token((token, expiration_time))
+    if user is None:
+        raise CommandError("Invalid token. Please log in.")
+    return AuthContext(user, token, expiration_time)
 
+
+def require_login(command_func): 
+    # function to ensur the user is logged in
+    @wraps(command_func)
+    def wrapper(*args, **kwargs): # Definition of wrapper function
+        # The token and the user are handed to the decorators and the command, so they are not read again
+        kwargs['auth'] = get_login_context(kwargs.get('auth'))
         return command_func(*args, **kwargs) # Return the command function
 
     return wrapper
 
 def get_user_role_from_token():
-    # get role of the logged in user from .token
-    try:
-        with open('.token', 'r') as token_file:
-            data = json.load(token_file)
-            return data.get('user_role', '')
-    except (FileNotFoundError, json.JSONDecodeError, KeyError):
-        return ''
+    # get role of the logged in user from the token file of the session
+    return load_session().get('user_role', '')
 
 
 def get_user_id_from_token():
-    # get id of the logged in user from .token
-    try:
-        with open('.token', 'r') as token_file:
-            data = json.load(token_file)
-            return data.get('user_id', '')
-    except (FileNotFoundError, json.JSONDecodeError, KeyError):
-        return ''
+    # get id of the logged in user from the token file of the session
+    return load_session().get('user_id', '')
     
 
 def is_management_team(view_func):
     # Permissions which ensure that the employee is part of the management team
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        user_role = get_user_role_from_token()
+        user_role = get_auth_context(kwargs).role
         if user_role != "management":
             raise CommandError("You do not have permission to perform this action.")
         return view_func(request, *args, **kwargs)
@@ -58,104 +111,143 @@ def is_sales_team(view_func):
     # Permissions to ensure that the employee is part of the sales team
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        user_role = get_user_role_from_token()
+        user_role = get_auth_context(kwargs).role
         if user_role != "sales":
             raise CommandError("You do not have permission to perform this action.")
         return view_func(request, *args, **kwargs)
     return _wrapped_view
 
 
+def check_object_permissions(model, auth, object_ids, related=()):
+    # Resolve the permission of the user on many objects at once: the objects the user can edit are loaded
+    # (and locked) in one id__in query with the ownership rule of model.objects.editable_by(), and only a refused
+    # access pays for a second query, to tell the missing objects from someone else's.
+    # Every decision is checked again by the first query, so a reassignment made by another process is seen at once.
+    # The permission cache only saves the second query: a refused object keeps its cached denied or missing reason.
+    # Returns the allowed objects keyed by ID, the denied IDs and the missing IDs.
+    user = auth.user if auth.user is not None else User(id=auth.user_id, role=auth.role)
+    object_ids = set(object_ids)
+    objects = model.objects.select_related(*related).select_for_update(of=('self',))
+    allowed = objects.editable_by(user).in_bulk(object_ids)
+
+    refused_ids = object_ids - set(allowed)
+    cached = {object_id: permission_cache.get('edit', model, object_id, auth) for object_id in refused_ids}
+    unknown_ids = {object_id for object_id, decision in cached.items() if decision not in (DENIED, MISSING)}
+    refused_denied = {object_id for object_id, decision in cached.items() if decision == DENIED}
+    if unknown_ids:
+        refused_denied |= set(model.objects.filter(pk__in=unknown_ids).values_list('pk', flat=True))
+
+    for object_id in object_ids:
+        decision = ALLOWED if object_id in allowed else DENIED if object_id in refused_denied else MISSING
+        permission_cache.set('edit', model, object_id, auth, decision)
+    return allowed, refused_denied, refused_ids - refused_denied
+
+
+def get_guarded_objects(model, auth, object_ids, not_found, denied, related=()):
+    # Load the objects checked by a permission decorator, in the order of object_ids, with the relations the
+    # command needs. The rows stay locked until the command's transaction ends.
+    object_ids = [model._meta.pk.to_python(object_id) for object_id in object_ids]
+    allowed, denied_ids, missing_ids = check_object_permissions(model, auth, object_ids, related)
+    if missing_ids:
+        raise CommandError(not_found.format(', '.join(str(object_id) for object_id in sorted(missing_ids))))
+    if denied_ids:
+        raise CommandError(denied)
+    return [allowed[object_id] for object_id in dict.fromkeys(object_ids)]
+
+
+def get_guarded_object(model, auth, object_id, not_found, denied, related=()):
+    # Load the single object checked by a permission decorator
+    return get_guarded_objects(model, auth, [object_id], not_found, denied, related)[0]
+
+
+def inject_guarded_objects(kwargs, name, model, auth, not_found, denied, related=()):
+    # kwargs[name + '_id'] holds one ID, or a list of IDs for the bulk commands: the object is handed to the
+    # command as kwargs[name], the list of objects as kwargs[name + 's']
+    object_ids = kwargs.get(f'{name}_id')
+    if isinstance(object_ids, (list, tuple, set)):
+        kwargs[f'{name}s'] = get_guarded_objects(model, auth, object_ids, not_found, denied, related)
+    else:
+        kwargs[name] = get_guarded_object(model, auth, object_ids, not_found, denied, related)
+
+
 def is_sales_team_and_client_rep(view_func):
     # Permissions to ensure that the employee is part of the sales team and is associated with the client
+    # The client is loaded once and handed to the command as kwargs['client'] (kwargs['clients'] for a bulk command)
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
         # check user role
-        user_role = get_user_role_from_token()
+        auth = get_auth_context(kwargs)
+        user_role = auth.role
         if user_role != "sales":
             raise CommandError("You do not have permission to perform this action.")
 
-        # check if user is associated with the client
-        user_id = get_user_id_from_token()
-        client_id = kwargs.get('client_id')
-
-        try:
-            client = Client.objects.get(id=client_id, sales_rep=user_id)
-        except Client.DoesNotExist:
-            raise CommandError("Access denied. You are not the Sales Representative assigned to this client.")
-
-        return view_func(request, *args, **kwargs)
+        with transaction.atomic():
+            # the user must be associated with the client
+            inject_guarded_objects(kwargs, 'client', Client, auth, "Client with ID {} not found",
+                                   "Access denied. You are not the Sales Representative assigned to this client.")
+            return view_func(request, *args, **kwargs)
 
     return _wrapped_view
 
 
 def is_contract_sales_rep_or_is_management_team(view_func):
     # Permission that ensures the user is the sales rep for the contract or a member of the management team
+    # The contract is loaded once and handed to the command as kwargs['contract'] (kwargs['contracts'] for a bulk command)
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
         # check user role
-        user_role = get_user_role_from_token()
-        user_id = get_user_id_from_token()
-
-        if user_role == "sales":
-            # check if user is the sales rep to the contract client
-            contract_id = kwargs['contract_id']
-
-            try:
-                contract = Contract.objects.get(id=contract_id, sales_rep=user_id)
-            except Contract.DoesNotExist:
-                raise CommandError("Access denied. You are not the sales person assigned to this contract.")
-        elif user_role == "management":
-            pass # grant access if the user is part of the management team
-        else:
+        auth = get_auth_context(kwargs)
+        user_role = auth.role
+
+        if user_role not in ("sales", "management"):
             raise CommandError("You do not have permission to perform this action.")
 
-        return view_func(request, *args, **kwargs)
+        with transaction.atomic():
+            # a sales person must be the sales rep of the contract, the management team is always granted access
+            # Contract.save() reads the sales rep
+            inject_guarded_objects(kwargs, 'contract', Contract, auth, "Contract with ID {} does not exist.",
+                                   "Access denied. You are not the sales person assigned to this contract.",
+                                   related=('sales_rep',))
+            return view_func(request, *args, **kwargs)
 
     return _wrapped_view
 
 
 def require_sales_event_access(views_func):
     # Permission which ensures that the sales person is indeed linked to the customer of the contract
+    # The contract is loaded once and handed to the command as kwargs['contract'] (kwargs['contracts'] for a bulk command)
     @wraps(views_func)
     def _wrapped_view(request, *args, **kwargs):
         # check user role
-        user_role = get_user_role_from_token()
+        auth = get_auth_context(kwargs)
+        user_role = auth.role
         if user_role != "sales":
             raise CommandError("You do not have permission to perform this action.")
-        # Checks if the user is associated with the event client
-        user_id = get_user_id_from_token()
-        contract_id = kwargs.get('contract_id')
-
-        try:
-            contract = Contract.objects.get(id=contract_id, sales_rep=user_id)
-        except Contract.DoesNotExist:
-            raise CommandError("Access denied. You are not the sales person assigned to this event.")
 
-        return views_func(request, *args, **kwargs)
+        with transaction.atomic():
+            # the user must be associated with the event client
+            inject_guarded_objects(kwargs, 'contract', Contract, auth, "Contract with ID {} does not exist.",
+                                   "Access denied. You are not the sales person assigned to this event.")
+            return views_func(request, *args, **kwargs)
 
     return _wrapped_view
 
 
 def is_event_support_or_is_management_team(view_func):
     # Permission that ensures the user is support staff for the event or a member of the management team
+    # The event is loaded once and handed to the command as kwargs['event'] (kwargs['events'] for a bulk command)
     @wraps(view_func)
     def _wrapped_view(request, *args, **kwargs):
-        user_role = get_user_role_from_token()
-
-        if user_role == "support":
-            user_id = get_user_id_from_token()
-            event_id = kwargs['event_id']
+        auth = get_auth_context(kwargs)
+        user_role = auth.role
 
-            try:
-                event = Event.objects.get(id=event_id, support_staff=user_id)
-            except Event.DoesNotExist:
-                raise CommandError("Access denied. You are not the Support staff assigned to this event.")
-
-        elif user_role == "management":
-            pass # grant access if the user is part of the management team
-        else:
+        if user_role not in ("support", "management"):
             raise CommandError("You do not have permission to perform this action.")
 
-        return view_func(request, *args, **kwargs)
+        with transaction.atomic():
+            # a support user must be the support staff of the event, the management team is always granted access
+            inject_guarded_objects(kwargs, 'event', Event, auth, "Event with ID {} does not exist.",
+                                   "Access denied. You are not the Support staff assigned to this event.")
+            return view_func(request, *args, **kwargs)
 
     return _wrapped_view
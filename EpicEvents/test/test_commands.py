@@ -22,7 +22,7 @@ class CreateClientCommandTest(TestCase):
         }
         self.out = StringIO()
 
-    @patch('EpicEvents.management.commands.create_client.get_user_id_from_token')
+    @patch('EpicEvents.permissions.get_user_id_from_token')
     def test_get_user_id_from_token(self, mock_get_user_id_from_token):
         mock_get_user_id_from_token.return_value = self.admin_user.id
         self.assertEqual(self.admin_user.id, mock_get_user_id_from_token())
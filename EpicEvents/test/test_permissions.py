@@ -108,7 +108,7 @@ class IsSalesTeamTestCase(TestCase):
 class IsSalesTeamAndClientRepTestCase(TestCase):
     @patch('EpicEvents.permissions.get_user_role_from_token')
     @patch('EpicEvents.permissions.get_user_id_from_token')
-    @patch('EpicEvents.models.Client.objects.get')
+    @patch('EpicEvents.permissions.get_guarded_object')
     def test_is_sales_team_and_client_rep_with_correct_role_and_client(self, mock_client_get, mock_get_user_id_from_token, mock_get_user_role_from_token):
         mock_get_user_role_from_token.return_value = "sales"
         mock_get_user_id_from_token.return_value = 'user_id'
@@ -118,14 +118,14 @@ class IsSalesTeamAndClientRepTestCase(TestCase):
 
         @is_sales_team_and_client_rep
         def dummy_view(request, **kwargs):
-            return True
+            return kwargs['client']
         
-        self.assertTrue(dummy_view(request, **kwargs))
+        self.assertIs(dummy_view(request, **kwargs), mock_client_get.return_value)
 
 class IsContractSalesRepOrIsManagementTeamTestCase(TestCase):
     @patch('EpicEvents.permissions.get_user_role_from_token')
     @patch('EpicEvents.permissions.get_user_id_from_token')
-    @patch('EpicEvents.models.Contract.objects.get')
+    @patch('EpicEvents.permissions.get_guarded_object')
     def test_with_sales_role_and_correct_contract(self, mock_contract_get, mock_get_user_id_from_token, mock_get_user_role_from_token):
         # Arrange
         mock_get_user_role_from_token.return_value = "sales"
@@ -137,14 +137,14 @@ class IsContractSalesRepOrIsManagementTeamTestCase(TestCase):
         # Act & Assert
         @is_contract_sales_rep_or_is_management_team
         def dummy_view(request, **kwargs):
-            return True
+            return kwargs['contract']
         
-        self.assertTrue(dummy_view(request, **kwargs))
+        self.assertIs(dummy_view(request, **kwargs), mock_contract_get.return_value)
 
 class RequireSalesEventAccessTestCase(TestCase):
     @patch('EpicEvents.permissions.get_user_role_from_token')
     @patch('EpicEvents.permissions.get_user_id_from_token')
-    @patch('EpicEvents.models.Contract.objects.get')
+    @patch('EpicEvents.permissions.get_guarded_object')
     def test_with_sales_role_linked_to_contract_customer(self, mock_contract_get, mock_get_user_id_from_token, mock_get_user_role_from_token):
         # Arrange
         mock_get_user_role_from_token.return_value = "sales"
@@ -156,14 +156,14 @@ class RequireSalesEventAccessTestCase(TestCase):
         # Act & Assert
         @require_sales_event_access
         def dummy_view(request, **kwargs):
-            return True
+            return kwargs['contract']
         
-        self.assertTrue(dummy_view(request, **kwargs))
+        self.assertIs(dummy_view(request, **kwargs), mock_contract_get.return_value)
 
 class IsEventSupportOrIsManagementTeamTestCase(TestCase):
     @patch('EpicEvents.permissions.get_user_role_from_token')
     @patch('EpicEvents.permissions.get_user_id_from_token')
-    @patch('EpicEvents.models.Event.objects.get')
+    @patch('EpicEvents.permissions.get_guarded_object')
     def test_with_support_role_and_assigned_to_event(self, mock_event_get, mock_get_user_id_from_token, mock_get_user_role_from_token):
         # Arrange
         mock_get_user_role_from_token.return_value = "support"
@@ -175,8 +175,8 @@ class IsEventSupportOrIsManagementTeamTestCase(TestCase):
         # Act & Assert
         @is_event_support_or_is_management_team
         def dummy_view(request, **kwargs):
-            return True
+            return kwargs['event']
         
-        self.assertTrue(dummy_view(request, **kwargs))
+        self.assertIs(dummy_view(request, **kwargs), mock_event_get.return_value)
 
 
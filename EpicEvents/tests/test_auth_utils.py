@@ -0,0 +1,165 @@
+import jwt
+import os
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from EpicEvents.auth_utils import generate_token, validate_token, load_token, load_revocations, revoke_tokens
+from EpicEvents.auth_utils import get_token_file_path, load_session, refresh_session, default_session_dir
+from EpicEvents.models import User
+from EpicEvents.permissions import require_login
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+import crm
+
+
+@pytest.fixture
+def user(tmp_path, monkeypatch):
+    # The token files are written in a temporary working directory
+    monkeypatch.chdir(tmp_path)
+    return User.objects.create_user(username='testsales', fullname='Test sales', role='sales')
+
+
+def login(user):
+    generate_token(user, datetime.now(timezone.utc) + timedelta(hours=2))
+    return load_token()
+
+
+@pytest.mark.django_db
+def test_validate_token_trusts_the_claims_without_queries(user, capsys):
+    token = login(user)
+    load_revocations()
+
+    with CaptureQueriesContext(connection) as context:
+        logged_user = validate_token(token)
+
+    assert len(context.captured_queries) == 0
+    assert (logged_user.id, logged_user.role, logged_user.fullname) == (user.id, 'sales', 'Test sales')
+    assert capsys.readouterr().out == ""
+
+
+@pytest.mark.django_db
+def test_revoked_token_is_refused(user):
+    token = login(user)
+
+    revoke_tokens(user)
+
+    assert validate_token(token) is None
+    assert validate_token(login(user)).id == user.id
+
+
+@pytest.mark.django_db
+def test_revocations_made_elsewhere_are_read_when_the_cache_is_missing(user):
+    token = login(user)
+    User.objects.filter(pk=user.pk).update(token_version=1)
+
+    assert validate_token(token) is None
+
+
+@pytest.mark.django_db
+def test_token_without_role_claims_loads_the_user(user):
+    expiration_time = datetime.now(timezone.utc) + timedelta(hours=2)
+    token = jwt.encode({'user_id': user.id, 'exp': expiration_time}, settings.TOKEN_KEY, algorithm='HS256')
+
+    assert validate_token((token, expiration_time)) == user
+
+
+@pytest.mark.django_db
+def test_sessions_do_not_overwrite_each_other(user, monkeypatch):
+    manager = User.objects.create_user(username='testmanager', fullname='Test manager', role='management')
+    monkeypatch.setenv('EPICEVENTS_SESSION', 'batch-job')
+    login(manager)
+
+    monkeypatch.setenv('EPICEVENTS_SESSION', 'alice')
+    assert load_token() == (None, None)
+    login(user)
+
+    assert validate_token(load_token()).id == user.id
+    monkeypatch.setenv('EPICEVENTS_SESSION', 'batch-job')
+    assert validate_token(load_token()).id == manager.id
+
+
+@pytest.mark.django_db
+def test_token_file_is_replaced_atomically(user, monkeypatch, session_dir):
+    monkeypatch.setenv('EPICEVENTS_SESSION', '../elsewhere')
+    login(user)
+    login(user)
+
+    # no temporary file is left behind, the session name cannot leave the session directory
+    assert os.listdir(session_dir) == [os.path.basename(get_token_file_path())]
+    assert os.stat(get_token_file_path()).st_mode & 0o077 == 0
+
+
+def test_default_session_dir_is_private_to_the_os_user(monkeypatch):
+    monkeypatch.setenv('XDG_RUNTIME_DIR', '/run/user/1000')
+    assert default_session_dir('/srv/crm') == '/run/user/1000/epicevents/srv_crm'
+
+    monkeypatch.delenv('XDG_RUNTIME_DIR')
+    monkeypatch.setenv('HOME', '/home/alice')
+    assert default_session_dir('/srv/crm') == '/home/alice/.epicevents/srv_crm'
+    # crm.py finds the sessions without Django
+    assert crm.default_session_dir() == default_session_dir()
+
+
+@pytest.mark.django_db
+def test_expired_token_is_refreshed_without_password(user, mocker):
+    generate_token(user, datetime.now(timezone.utc) - timedelta(minutes=1))
+    check_password = mocker.patch('EpicEvents.models.User.check_password')
+
+    @require_login
+    def command(**kwargs):
+        return kwargs['auth']
+
+    auth = command()
+
+    assert auth.user.id == user.id
+    assert auth.expiration_time > datetime.now(timezone.utc)
+    check_password.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_refresh_is_refused_after_revocation_or_session_end(user, monkeypatch):
+    login(user)
+    assert refresh_session()[0] is not None
+
+    revoke_tokens(user)
+    assert refresh_session() == (None, None)
+
+    user.refresh_from_db()
+    login(user)
+    monkeypatch.setattr('EpicEvents.auth_utils.SESSION_MAX_LIFETIME', timedelta(0))
+    assert refresh_session() == (None, None)
+
+
+@pytest.mark.django_db
+def test_refresh_token_is_not_an_access_token(user):
+    login(user)
+    session = load_session()
+
+    assert validate_token((session['refresh_token'], datetime.now(timezone.utc) + timedelta(hours=1))) is None
+
+
+@pytest.mark.django_db
+def test_refresh_command(user):
+    output = StringIO()
+    with pytest.raises(CommandError):
+        call_command('refresh', stdout=output)
+
+    login(user)
+    call_command('refresh', stdout=output)
+
+    assert "Session extended until" in output.getvalue()
+
+
+@pytest.mark.django_db
+def test_tokens_of_a_deleted_user_are_refused_in_other_session_dirs(user, tmp_path, monkeypatch):
+    token = login(user)
+    manager = User.objects.create_user(username='testmanager', fullname='Test manager', role='management')
+    login(manager)
+    call_command('delete_user', user.id, stdout=StringIO())
+
+    # the session directory of another OS user (or host) has no local stamp of the deletion
+    monkeypatch.setattr('EpicEvents.auth_utils.SESSION_DIR', str(tmp_path / 'other'))
+    assert validate_token(token) is None
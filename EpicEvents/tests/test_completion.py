@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from EpicEvents.completion import refresh_index
+from EpicEvents.models import Client, Contract, Event, User
+from crm import complete
+from datetime import date
+
+
+@pytest.fixture
+def support(tmp_path, monkeypatch):
+    # The index is written in a temporary working directory
+    monkeypatch.chdir(tmp_path)
+    return User.objects.create_user(username='testsupport', fullname='Test support', role='support')
+
+
+@pytest.fixture
+def acme_client():
+    sales = User.objects.create_user(username='testsales', fullname='Test sales', role='sales')
+    return Client.objects.create(fullname="Acme", email="acme@example.com", sales_rep=sales)
+
+
+def create_event(support, client, name):
+    contract = Contract.objects.create(client=client, sales_rep=client.sales_rep, total_amount=1000,
+                                       amount_remaining=500, status='signed')
+    return Event.objects.create(contract=contract, name=name, start_date=date(2024, 1, 1), end_date=date(2024, 1, 2),
+                                support_staff=support, location="location", attendees=10, notes="notes")
+
+
+@pytest.mark.django_db
+def test_refresh_reads_the_changed_rows_only(support, acme_client):
+    event = create_event(support, acme_client, "Conference")
+    index = refresh_index(support)
+    assert index['events'] == {str(event.id): "Conference"}
+
+    acme_client.fullname = "Acme Corp"
+    acme_client.save()
+    with CaptureQueriesContext(connection) as context:
+        index = refresh_index(support)
+
+    contract = str(event.contract_id)
+    assert index['clients'][str(acme_client.id)] == "Acme Corp"
+    assert index['contracts'][contract] == "Acme Corp - signed"
+    # the names are only read from the rows changed since the last refresh
+    name_queries = [query['sql'] for query in context.captured_queries if 'name"' in query['sql']]
+    assert name_queries and all('"updated_at" >=' in sql for sql in name_queries)
+
+
+@pytest.mark.django_db
+def test_refresh_removes_the_deleted_and_reassigned_rows(support, acme_client):
+    kept, deleted, reassigned = (create_event(support, acme_client, name) for name in ("Kept", "Deleted", "Reassigned"))
+    refresh_index(support)
+
+    deleted.delete()
+    create_event(User.objects.create_user(username='other', fullname='Other', role='support'), acme_client, "Other")
+    reassigned.support_staff = User.objects.get(username='other')
+    reassigned.save()
+
+    assert refresh_index(support)['events'] == {str(kept.id): "Kept"}
+
+
+@pytest.mark.django_db
+def test_completion_of_commands_options_and_ids(support, acme_client):
+    event = create_event(support, acme_client, "Conference")
+    index = refresh_index(support)
+
+    assert complete(1, ['crm.py', 'update_ev'], index) == ['update_event']
+    assert '--support_staff_id' in complete(2, ['crm.py', 'update_event', '--su'], index)
+    assert complete(2, ['crm.py', 'update_event', 'conf'], index) == [f"{event.id}\tConference"]
+    assert complete(3, ['crm.py', 'update_event', '--support_staff_id', 'test'], index) == [
+        f"{support.id}\tTest support", f"{acme_client.sales_rep_id}\tTest sales"]
+    assert complete(3, ['crm.py', 'read_events', '--format', 'j'], index) == ['jsonl']
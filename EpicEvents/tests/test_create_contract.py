@@ -28,6 +28,14 @@ def test_create_contract_success(mocker, custom_input):
             role='sales'
         )
 
+    # Create a dummy manager, who is the logged in user
+    manager = User.objects.create_user(
+            username='testmanager',
+            password='testpassword',
+            fullname='Test manager',
+            role='management'
+        )
+
     expected_output = "Contract 1 created sucessfully."
 
     # Mock the getpass function to avoid real password requests
@@ -45,7 +53,7 @@ def test_create_contract_success(mocker, custom_input):
         mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
 
         # Mock the validate_token function to return a valid user
-        mocker.patch('EpicEvents.permissions.validate_token', return_value=sales)
+        mocker.patch('EpicEvents.permissions.validate_token', return_value=manager)
 
         # Capturing standard output for verification
         with patch('sys.stdout', new_callable=Mock) as mock_stdout:
@@ -55,7 +55,7 @@ def test_create_event_success(mocker, custom_input):
         mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
 
         # Mock the validate_token function to return a valid user
-        mocker.patch('EpicEvents.permissions.validate_token', return_value=support_user)
+        mocker.patch('EpicEvents.permissions.validate_token', return_value=sales)
 
         # Capturing standard output for verification
         with patch('sys.stdout', new_callable=Mock) as mock_stdout:
@@ -101,6 +101,12 @@ def test_create_events_permission_failure(mocker, custom_input):
         status='in progress'
         )
 
+    # Create a dummy logged in user for testing (role: 'gestion' rather than 'sales')
+    logged_user = User.objects.create(
+        username='testgestion',
+        role='gestion'
+        )
+
     # Mock the getpass function to avoid real password requests
     mocker.patch('getpass.getpass', return_value='testpassword')
 
@@ -113,7 +119,7 @@ def test_create_events_permission_failure(mocker, custom_input):
         mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
 
         # Mock the validate_token function to return a valid user
-        mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+        mocker.patch('EpicEvents.permissions.validate_token', return_value=logged_user)
 
         # Capturing standard output for verification
         with patch('sys.stdout', new_callable=Mock) as mock_stdout:
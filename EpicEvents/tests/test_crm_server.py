@@ -0,0 +1,73 @@
+import os
+import pytest
+import socket
+from EpicEvents.auth_utils import generate_token, load_token, current_token_file
+from EpicEvents.management.commands.crm_server import Command, SocketStream
+from EpicEvents.models import User
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+
+@pytest.fixture
+def client_directory(tmp_path, monkeypatch):
+    # A client logged in from tmp_path with EPICEVENTS_SESSION_DIR=.sessions, the server runs from another directory
+    # with its own session directory
+    client_directory = tmp_path / 'client'
+    client_directory.mkdir()
+    monkeypatch.chdir(client_directory)
+    monkeypatch.setattr('EpicEvents.auth_utils.SESSION_DIR', '.sessions')
+    user = User.objects.create_user(username='testmanager', fullname='Test manager', role='management')
+    generate_token(user, datetime.now(timezone.utc) + timedelta(hours=2))
+    server_directory = tmp_path / 'server'
+    server_directory.mkdir()
+    monkeypatch.chdir(server_directory)
+    monkeypatch.setattr('EpicEvents.auth_utils.SESSION_DIR', str(server_directory / 'sessions'))
+    return str(client_directory)
+
+
+def run(client_directory, *argv):
+    stdout, stderr = StringIO(), StringIO()
+    request = {'argv': list(argv), 'cwd': client_directory, 'session': os.getenv('EPICEVENTS_SESSION'),
+               'session_dir': '.sessions'}
+    exit_code, interactive = Command().run(request, stdout, stderr)
+    return exit_code, interactive, stdout.getvalue(), stderr.getvalue()
+
+
+@pytest.mark.django_db
+def test_server_runs_the_command_with_the_client_session(client_directory):
+    exit_code, interactive, stdout, stderr = run(client_directory, 'read_users', '--format', 'csv')
+
+    assert (exit_code, interactive, stderr) == (0, False, "")
+    assert stdout.splitlines() == ["id,fullname,username,role", f"{User.objects.get().id},Test manager,testmanager,management"]
+    # the server goes back to its own directory and session
+    assert os.path.basename(os.getcwd()) == 'server'
+    assert current_token_file.get() is None and load_token() == (None, None)
+
+
+@pytest.mark.django_db
+def test_server_reports_errors_like_manage_py(client_directory):
+    assert run(client_directory, 'delete_event', '99')[:2] == (1, False)
+    assert run(client_directory, 'delete_event', '99')[3] == "CommandError: Event with ID 99 does not exist.\n"
+    assert run(client_directory, 'unknown_command')[0] == 1
+
+
+@pytest.mark.django_db
+def test_commands_using_the_terminal_run_on_the_client(client_directory):
+    # create_new_user prompts for the fields and the password
+    assert run(client_directory, 'create_new_user')[:2] == (0, True)
+    assert run(client_directory, 'create_new_user', '--fullname', 'A', '--username', 'a', '--role', 'sales')[:2] == (0, True)
+    assert run(client_directory, 'login')[:2] == (0, True)
+
+
+@pytest.mark.django_db
+def test_client_disconnecting_during_the_response_does_not_stop_the_server(client_directory):
+    server_end, client_end = socket.socketpair()
+    client_end.close() # like `crm.py read_users | head -1` or Ctrl-C
+    stdout, stderr = SocketStream(server_end, 'stdout'), SocketStream(server_end, 'stderr')
+    request = {'argv': ['read_users'], 'cwd': client_directory, 'session': os.getenv('EPICEVENTS_SESSION'),
+               'session_dir': '.sessions'}
+
+    # the error is not reported again to the dead socket
+    assert Command().run(request, stdout, stderr) == (1, False)
+    assert stdout.disconnected
+    server_end.close()
@@ -1,9 +1,12 @@
 import pytest
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from EpicEvents.models import Event, User, Client, Contract
 from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, Mock
+from io import StringIO
 
 
 @pytest.fixture
@@ -70,9 +73,9 @@ def test_delete_event_success(mocker, custom_input):
     # Using patch to simulate user input
     with patch('builtins.input', side_effect=custom_input):
         # Mock to bypass permission check
-        mocker.patch('EpicEvents.permissions.get_user_role_from_token', return_value='support')
+        mocker.patch('EpicEvents.permissions.get_user_role_from_token', return_value='management')
         mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
-        mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+        mocker.patch('EpicEvents.permissions.validate_token', return_value=management_user)
 
         # Capturing standard output for verification
         with patch('sys.stdout', new_callable=Mock) as mock_stdout:
@@ -277,7 +280,7 @@ def test_delete_event_event_not_found(mocker, custom_input):
         # Mock to bypass permission check
         mocker.patch('EpicEvents.permissions.get_user_role_from_token', return_value='management')
         mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
-        mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+        mocker.patch('EpicEvents.permissions.validate_token', return_value=management_user)
 
         # Capturing standard output for verification
         with patch('sys.stderr', new_callable=Mock) as mock_stderr:
@@ -286,3 +289,48 @@ def test_delete_event_event_not_found(mocker, custom_input):
             except CommandError as ce:
                 # Checking the error message
                 assert str(ce) == "Event with ID 9999 does not exist."
+
+
+def create_support_events(support, count, start=0):
+    # Create `count` events assigned to the support user
+    sales = User.objects.create_user(username=f'testsales{start}', fullname=f'Test sales {start}', role='sales')
+    client = Client.objects.create(fullname='Client Test', email=f'test{start}@example.com')
+    contract = Contract.objects.create(client=client, sales_rep=sales, total_amount='1000.00',
+                                       amount_remaining='800.00', status='signed')
+    return [Event.objects.create(contract=contract, name=f'event {i}', start_date=datetime.now(), end_date='2024-12-05',
+                                 support_staff=support, location='location test', attendees=50, notes='notes test')
+            for i in range(start, start + count)]
+
+
+@pytest.mark.django_db
+def test_delete_events_in_bulk_checks_permissions_in_one_query(mocker):
+    support = User.objects.create_user(username='testsupport', fullname='Test support', role='support')
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=support)
+    few_ids = [event.pk for event in create_support_events(support, 2)]
+    many_ids = [event.pk for event in create_support_events(support, 10, start=2)]
+
+    with CaptureQueriesContext(connection) as few_context:
+        call_command('delete_event', *few_ids, stdout=StringIO())
+    with CaptureQueriesContext(connection) as many_context:
+        call_command('delete_event', *many_ids, stdout=StringIO())
+
+    assert len(few_context.captured_queries) == len(many_context.captured_queries)
+    assert not Event.objects.exists()
+
+
+@pytest.mark.django_db
+def test_delete_events_in_bulk_is_refused_as_a_whole(mocker):
+    support = User.objects.create_user(username='testsupport', fullname='Test support', role='support')
+    other_support = User.objects.create_user(username='othersupport', fullname='Other support', role='support')
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=support)
+    event_ids = [event.pk for event in create_support_events(support, 2)]
+    event_ids += [event.pk for event in create_support_events(other_support, 1, start=2)]
+
+    with pytest.raises(CommandError, match="Access denied"):
+        call_command('delete_event', *event_ids)
+    with pytest.raises(CommandError, match="Event with ID 9998, 9999 does not exist."):
+        call_command('delete_event', event_ids[0], 9999, 9998)
+
+    assert Event.objects.count() == 3
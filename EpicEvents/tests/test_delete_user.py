@@ -1,7 +1,8 @@
 import pytest
 from django.core.management import call_command
 from django.core.management.base import CommandError
-from EpicEvents.models import Client, User
+from EpicEvents.models import Client, Contract, Event, User
+from EpicEvents.auth_utils import load_revocations
 from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, Mock
 
@@ -108,3 +109,23 @@ def test_delete_user_not_found(mocker, custom_input):
                 call_command('delete_user', 999)
             except CommandError as ce:
                 assert str(ce) == "User with ID 999 not found"
+
+
+@pytest.mark.django_db
+def test_delete_support_of_events_keeps_the_user_and_tokens(mocker, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    support = User.objects.create_user(username='testsupport', fullname='Test Support', role='support')
+    user = User.objects.create_user(username='testuser', fullname='Test User', role='management')
+    client = Client.objects.create(fullname="Client A", email="a@example.com", sales_rep=user)
+    contract = Contract.objects.create(client=client, sales_rep=user, total_amount=1000, amount_remaining=500)
+    Event.objects.create(contract=contract, name="Event", start_date=datetime(2024, 1, 1), end_date=datetime(2024, 1, 2),
+                         support_staff=support, location="Paris", attendees=10)
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+
+    with pytest.raises(CommandError, match="support contact of events"):
+        call_command('delete_user', support.id)
+
+    support.refresh_from_db()
+    assert support.token_version == 0
+    assert str(support.id) not in load_revocations()
@@ -0,0 +1,135 @@
+import io
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from EpicEvents.auth_utils import generate_token, load_token, revoke_tokens, delete_token
+from EpicEvents.management.commands import utils
+from EpicEvents.management.commands.execute import Command
+from EpicEvents.models import Client, Contract, User
+from datetime import datetime, timedelta, timezone
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    # The token files are written in a temporary working directory
+    monkeypatch.chdir(tmp_path)
+    user = User.objects.create_user(username='testmanager', fullname='Test manager', role='management')
+    generate_token(user, datetime.now(timezone.utc) + timedelta(hours=2))
+    return user
+
+
+@pytest.mark.django_db
+def test_menu_actions_reuse_the_commands_and_the_login(manager, mocker, capsys):
+    mocker.patch('builtins.input', side_effect=['2', str(manager.id), '2', '', 'x'])
+    load_token_spy = mocker.patch('EpicEvents.permissions.load_token', wraps=load_token)
+    load_command_class_spy = mocker.spy(utils, 'load_command_class')
+
+    Command().handle(user_role='management')
+
+    # the token is read for the first action only, read_users and logout are loaded once
+    assert load_token_spy.call_count == 1
+    assert [call.args[1] for call in load_command_class_spy.call_args_list] == ['read_users', 'logout']
+    output = capsys.readouterr().out
+    assert output.count('testmanager') == 2
+    assert 'Logout successful!' in output
+    assert load_token() == (None, None)
+
+
+@pytest.mark.django_db
+def test_menu_session_asks_to_log_in_again_after_logout(manager, mocker):
+    session = utils.MenuSession()
+    session.run('read_users')
+    session.logout()
+
+    with pytest.raises(CommandError, match="User not logged in"):
+        session.run('read_users')
+
+
+@pytest.mark.django_db
+def test_menu_session_refuses_a_revoked_login(manager):
+    session = utils.MenuSession()
+    session.run('read_users')
+    revoke_tokens(manager)
+
+    with pytest.raises(CommandError, match="Invalid token"):
+        session.run('read_users')
+
+
+@pytest.mark.django_db
+def test_menu_session_stops_after_a_logout_in_another_shell(manager):
+    session = utils.MenuSession()
+    session.run('read_users')
+    delete_token()
+
+    with pytest.raises(CommandError, match="User not logged in"):
+        session.run('read_users')
+
+
+@pytest.fixture
+def sales(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    user = User.objects.create_user(username='testsales', fullname='Test sales', role='sales')
+    generate_token(user, datetime.now(timezone.utc) + timedelta(hours=2))
+    return user
+
+
+SCRIPT = """# two clients, the second line fails
+create_client --fullname "Client A" --email a@example.com --phone 01 --company_name "Company A"
+update_client 999 --fullname "Nobody"
+
+create_client --fullname "Client B" --email b@example.com --phone 02 --company_name "Company B"
+"""
+
+
+@pytest.mark.django_db
+def test_script_reports_the_failing_lines_and_runs_the_others(sales, tmp_path, capsys):
+    script = tmp_path / 'ops.txt'
+    script.write_text(SCRIPT)
+
+    with pytest.raises(CommandError, match="3 commands run, 1 failed."):
+        call_command('execute', script=str(script))
+
+    assert sorted(Client.objects.values_list('fullname', flat=True)) == ['Client A', 'Client B']
+    assert capsys.readouterr().err.startswith("line 3: ")
+
+
+@pytest.mark.django_db
+def test_atomic_script_saves_nothing_when_a_line_fails(sales, tmp_path):
+    script = tmp_path / 'ops.txt'
+    script.write_text(SCRIPT)
+
+    with pytest.raises(CommandError, match="no change was saved"):
+        call_command('execute', script=str(script), atomic=True)
+
+    assert not Client.objects.exists()
+
+
+@pytest.mark.django_db
+def test_script_lines_cannot_prompt(sales, mocker, capsys):
+    mocker.patch('sys.stdin', io.StringIO("create_client --fullname 'Client A'\n"))
+
+    with pytest.raises(CommandError, match="1 commands run, 1 failed."):
+        call_command('execute', script='-')
+
+    assert "line 1: create_client asks for input, give all its options" in capsys.readouterr().err
+
+
+@pytest.mark.django_db
+def test_atomic_script_rolls_back_on_invalid_values(sales, mocker, capsys):
+    client = Client.objects.create(fullname="Client A", email="a@example.com", sales_rep=sales)
+    contract = Contract.objects.create(client=client, sales_rep=sales, total_amount=1000, amount_remaining=500,
+                                       status='in progress')
+    mocker.patch('sys.stdin', io.StringIO(
+        f"update_contract {contract.id} --status signed --total_amount 2000 --amount_remaining 0\n"
+        f"update_contract {contract.id} --status unknown --total_amount 1 --amount_remaining 0\n"
+        f"update_contract {contract.id} --total_amount 5\n"
+        "read_contracts --help\n"))
+
+    with pytest.raises(CommandError, match="4 commands run, 1 failed, no change was saved."):
+        call_command('execute', script='-', atomic=True)
+
+    contract.refresh_from_db()
+    assert (contract.status, contract.total_amount) == ('in progress', 1000)
+    err = capsys.readouterr().err
+    assert err.startswith("line 2: Status 'unknown' is invalid")
+    assert "line 3" not in err and "line 4" not in err
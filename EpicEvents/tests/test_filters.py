@@ -0,0 +1,53 @@
+import pytest
+from django.core.management.base import CommandError
+from EpicEvents.models import Event, Contract
+from EpicEvents.filters import parse_period, filter_date_range, filter_number_range
+from datetime import date
+
+
+@pytest.fixture
+def today(mocker):
+    mocker.patch('django.utils.timezone.localdate', return_value=date(2024, 12, 20))
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2024-05-17', (date(2024, 5, 17), date(2024, 5, 18))),
+    ('2024-05', (date(2024, 5, 1), date(2024, 6, 1))),
+    ('2024-12', (date(2024, 12, 1), date(2025, 1, 1))),
+    ('2024', (date(2024, 1, 1), date(2025, 1, 1))),
+    ('today', (date(2024, 12, 20), date(2024, 12, 21))),
+    ('this-month', (date(2024, 12, 1), date(2025, 1, 1))),
+    ('next-7-days', (date(2024, 12, 20), date(2024, 12, 27))),
+    ('last-30-days', (date(2024, 11, 21), date(2024, 12, 21))),
+])
+def test_parse_period(today, value, expected):
+    assert parse_period(value) == expected
+
+
+@pytest.mark.parametrize('value', ['2024-13', '12-15', 'tomorrow', 'next-days'])
+def test_parse_period_rejects_invalid_values(value):
+    with pytest.raises(CommandError):
+        parse_period(value)
+
+
+def test_date_range_is_sargable():
+    sql = str(filter_date_range(Event.objects.all(), 'start_date', '2024-05', '2024-06').query)
+
+    assert 'LIKE' not in sql and 'CAST' not in sql
+    assert '"EpicEvents_event"."start_date" >= 2024-05-01' in sql
+    assert '"EpicEvents_event"."start_date" < 2024-07-01' in sql
+
+
+def test_date_range_within_period(today):
+    sql = str(filter_date_range(Contract.objects.all(), 'created_at', within='this-month').query)
+
+    assert '"EpicEvents_contract"."created_at" >= 2024-12-01' in sql
+    assert '"EpicEvents_contract"."created_at" < 2025-01-01' in sql
+
+
+def test_number_range_is_inclusive():
+    sql = str(filter_number_range(Contract.objects.all(), 'amount_remaining', 100, 500).query)
+
+    assert '"EpicEvents_contract"."amount_remaining" >= 100' in sql
+    assert '"EpicEvents_contract"."amount_remaining" <= 500' in sql
+    assert str(filter_number_range(Event.objects.all(), 'attendees').query) == str(Event.objects.all().query)
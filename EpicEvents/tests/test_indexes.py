@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from EpicEvents.models import Event, Contract, Client, User
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+
+
+def query_plan(queryset):
+    # EXPLAIN QUERY PLAN of the queryset, on one line
+    return ' '.join(queryset.explain().split())
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('queryset, index', [
+    # permission checks on a single object
+    (lambda: Contract.objects.filter(id=1, sales_rep=2), 'INTEGER PRIMARY KEY'),
+    (lambda: Event.objects.filter(id=1, support_staff=2), 'INTEGER PRIMARY KEY'),
+    (lambda: Client.objects.filter(id=1, sales_rep=2), 'INTEGER PRIMARY KEY'),
+    # listings
+    (lambda: Event.objects.filter(support_staff=2).order_by('start_date'), 'event_support_start_idx'),
+    (lambda: Contract.objects.filter(status='signed'), 'contract_status_created_idx'),
+    (lambda: Contract.objects.filter(status='signed', created_at__gte=date(2024, 1, 1)), 'contract_status_created_idx'),
+    (lambda: Contract.objects.filter(sales_rep=2, status='signed'), 'contract_salesrep_status_idx'),
+    (lambda: Event.objects.filter(start_date__gte=date(2024, 1, 1), start_date__lt=date(2024, 2, 1)), 'start_date'),
+    (lambda: Contract.objects.filter(created_at__gte=date(2024, 1, 1)), 'created_at'),
+    (lambda: Contract.objects.filter(amount_remaining__gte=1000), 'amount_remaining'),
+    (lambda: Contract.objects.filter(total_amount__gte=1000, total_amount__lte=5000), 'total_amount'),
+    (lambda: Event.objects.filter(attendees__gte=100), 'attendees'),
+])
+def test_hot_queries_use_an_index(queryset, index):
+    plan = query_plan(queryset())
+
+    assert 'SEARCH' in plan and index in plan
+    assert 'TEMP B-TREE' not in plan
+
+
+@pytest.mark.django_db
+def test_read_contracts_status_filter_uses_an_index(mocker):
+    user = User.objects.create_user(username='testuser', fullname='Test User', role='management')
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+
+    with CaptureQueriesContext(connection) as context:
+        call_command('read_contracts', '--status', 'signed', '--format', 'csv', stdout=StringIO())
+
+    # the query run by the command, not a hand-written equivalent
+    [sql] = [query['sql'] for query in context.captured_queries if 'FROM "EpicEvents_contract"' in query['sql']]
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+        plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+    # a SEARCH on the status, a LIKE would SCAN the index
+    assert 'SEARCH' in plan and 'contract_status_created_idx (status=?)' in plan
@@ -0,0 +1,223 @@
+import csv
+import json
+import pytest
+from tabulate import tabulate
+from django.core.management.base import CommandError, OutputWrapper
+from django.db import connection
+from django.db.models.signals import post_init
+from django.test.utils import CaptureQueriesContext
+from EpicEvents.models import Event, Contract, User, Client
+from EpicEvents.listing import EVENT_LISTING, CONTRACT_LISTING, CLIENT_LISTING, USER_LISTING, MAX_COLUMN_WIDTH, SAMPLE_SIZE
+from datetime import datetime
+from io import StringIO
+
+
+def create_events(count, start=0):
+    # Create `count` events, each with its own sales rep, client, contract and support staff
+    for i in range(start, start + count):
+        sales_rep = User.objects.create_user(username=f'sales{i}', fullname=f'Sales {i}', role='sales')
+        support = User.objects.create_user(username=f'support{i}', fullname=f'Support {i}', role='support')
+        client = Client.objects.create(fullname=f"Client {i}", email=f"client{i}@gmail.com",
+                                       phone="0606060606", company_name=f"company {i}",
+                                       sales_rep=sales_rep)
+        contract = Contract.objects.create(client=client, sales_rep=sales_rep, total_amount=1000,
+                                           amount_remaining=500, status='signed')
+        Event.objects.create(contract=contract, name=f"event {i}", start_date=datetime(2023, 12, 15),
+                             end_date=datetime(2023, 12, 16), support_staff=support,
+                             location=f"location {i}", attendees=50, notes=f"Notes {i}")
+
+
+def count_render_queries(listing):
+    with CaptureQueriesContext(connection) as context:
+        listing.write(OutputWrapper(StringIO()), listing.page(listing.model.objects.all()))
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('listing', [EVENT_LISTING, CONTRACT_LISTING, CLIENT_LISTING, USER_LISTING])
+def test_listing_query_count_does_not_grow_with_rows(listing):
+    create_events(2)
+    few_rows_queries = count_render_queries(listing)
+
+    create_events(10, start=2)
+    many_rows_queries = count_render_queries(listing)
+
+    assert few_rows_queries == many_rows_queries == 1
+
+
+@pytest.mark.django_db
+def test_event_listing_displays_relations():
+    create_events(1)
+
+    output = StringIO()
+    EVENT_LISTING.write(OutputWrapper(output), EVENT_LISTING.page(Event.objects.all()))
+    output = output.getvalue()
+
+    assert "List of Events" in output
+    assert "Client 0" in output
+    assert "support0" in output
+
+
+def read_all_pages(listing, order_by, page_size):
+    # Follow the cursors until the last page and return the IDs in display order
+    ids, after = [], None
+    while True:
+        page = listing.page(listing.model.objects.all(),
+                            {'order_by': order_by, 'page_size': page_size, 'after': after})
+        ids += [obj.id for obj in page]
+        after = page.next_cursor
+        if after is None:
+            return ids
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('order_by', ['id', '-id', 'start_date', '-start_date', 'name'])
+def test_keyset_pages_cover_every_row_once(order_by):
+    create_events(5)
+    expected = [event.id for event in EVENT_LISTING.page(Event.objects.all(), {'order_by': order_by})]
+
+    assert read_all_pages(EVENT_LISTING, order_by, page_size=2) == expected
+    assert sorted(expected) == sorted(Event.objects.values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+def test_keyset_page_does_not_use_offset():
+    create_events(3)
+    first_page = EVENT_LISTING.page(Event.objects.all(), {'page_size': 2})
+    list(first_page)
+
+    second_page = EVENT_LISTING.page(Event.objects.all(), {'page_size': 2, 'after': first_page.next_cursor})
+
+    assert 'OFFSET' not in str(second_page.queryset.query)
+    assert [event.name for event in second_page] == ["event 2"]
+    assert second_page.next_cursor is None
+
+
+@pytest.mark.django_db
+def test_cursor_must_match_sort_column():
+    create_events(3)
+    first_page = EVENT_LISTING.page(Event.objects.all(), {'page_size': 2})
+    list(first_page)
+
+    with pytest.raises(CommandError):
+        EVENT_LISTING.page(Event.objects.all(), {'order_by': 'name', 'after': first_page.next_cursor})
+
+    with pytest.raises(CommandError):
+        EVENT_LISTING.page(Event.objects.all(), {'after': 'not a cursor'})
+
+
+@pytest.mark.django_db
+def test_streamed_table_matches_tabulate_pretty_format():
+    create_events(3)
+    output = StringIO()
+
+    USER_LISTING.write(OutputWrapper(output), USER_LISTING.page(User.objects.all()))
+
+    rows = list(User.objects.order_by('id').values_list('id', 'fullname', 'username', 'role'))
+    table = tabulate(rows, headers=USER_LISTING.headers, tablefmt="pretty")
+    assert output.getvalue() == "{}\n{}\n".format("List of users".center(len(table.split('\n')[0])), table)
+
+
+@pytest.mark.django_db
+def test_streamed_table_truncates_values_wider_than_the_sample():
+    create_events(SAMPLE_SIZE + 1)
+    Event.objects.filter(name=f"event {SAMPLE_SIZE}").update(notes="x" * 500)
+    written = []
+
+    class Stream:
+        def write(self, line):
+            written.append(line)
+
+    EVENT_LISTING.write(Stream(), EVENT_LISTING.page(Event.objects.all()))
+
+    # title, 3 header lines, one line per row and the closing separator
+    assert len(written) == SAMPLE_SIZE + 6
+    assert len(set(len(line) for line in written[1:])) == 1
+    assert "x" * MAX_COLUMN_WIDTH not in "".join(written)
+    assert "x" * 4 + "..." in written[-2]
+
+
+@pytest.mark.django_db
+def test_streamed_table_never_truncates_ids_wider_than_the_sample():
+    for i in range(SAMPLE_SIZE):
+        User.objects.create_user(username=f'user{i}', fullname=f'User {i}', role='sales')
+    User.objects.create_user(id=1000, username='user1000', fullname='User 1000', role='sales')
+    User.objects.create_user(id=123456, username='user123456', fullname='User 123456', role='sales')
+    output = StringIO()
+
+    USER_LISTING.write(OutputWrapper(output), USER_LISTING.page(User.objects.all()))
+
+    lines = output.getvalue().splitlines()
+    # the names are still truncated to the width of the sample
+    assert lines[-3].startswith("| 1000 |") and lines[-2].startswith("| 123456 | User 1... |")
+
+
+@pytest.mark.django_db
+def test_machine_formats_are_read_without_instantiating_models():
+    create_events(3)
+    instantiated = []
+    post_init.connect(lambda sender, **kwargs: instantiated.append(sender), weak=False, dispatch_uid='count_instances')
+    output = StringIO()
+
+    try:
+        EVENT_LISTING.write(OutputWrapper(output), EVENT_LISTING.page(Event.objects.all()), 'jsonl')
+    finally:
+        post_init.disconnect(dispatch_uid='count_instances')
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert instantiated == []
+    assert [line['name'] for line in lines] == ["event 0", "event 1", "event 2"]
+    assert lines[0]['support_staff__username'] == "support0"
+    assert lines[0]['start_date'] == "2023-12-15"
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('format, delimiter', [('csv', ','), ('tsv', '\t')])
+def test_delimited_formats_keep_the_cursor_out_of_the_data(format, delimiter):
+    create_events(3)
+    output, errors = StringIO(), StringIO()
+
+    CONTRACT_LISTING.write(OutputWrapper(output), CONTRACT_LISTING.page(Contract.objects.all(), {'page_size': 2}),
+                           format, stderr=OutputWrapper(errors))
+
+    rows = list(csv.reader(StringIO(output.getvalue()), delimiter=delimiter))
+    assert rows[0] == CONTRACT_LISTING.fields
+    assert [row[1] for row in rows[1:]] == ["Client 0", "Client 1"]
+    assert errors.getvalue().startswith("Next page: --after ")
+
+
+@pytest.mark.django_db
+def test_columns_projection_only_reads_the_selected_fields():
+    create_events(2)
+    output = StringIO()
+
+    with CaptureQueriesContext(connection) as context:
+        EVENT_LISTING.write(OutputWrapper(output), EVENT_LISTING.page(Event.objects.all()), 'csv',
+                            'id,name,contract__client__fullname')
+
+    sql = context.captured_queries[0]['sql']
+    assert len(context.captured_queries) == 1
+    assert '"notes"' not in sql and '"location"' not in sql
+    assert list(csv.reader(StringIO(output.getvalue()))) == [
+        ['id', 'name', 'contract__client__fullname'],
+        [str(Event.objects.get(name="event 0").id), "event 0", "Client 0"],
+        [str(Event.objects.get(name="event 1").id), "event 1", "Client 1"],
+    ]
+
+
+@pytest.mark.django_db
+def test_columns_projection_in_table_uses_known_headers():
+    create_events(1)
+    output = StringIO()
+
+    EVENT_LISTING.write(OutputWrapper(output), EVENT_LISTING.page(Event.objects.all()), 'table',
+                        'name,support_staff__fullname')
+
+    assert "|  Name   | support_staff__fullname |" in output.getvalue()
+    assert "| event 0 |        Support 0        |" in output.getvalue()
+
+
+@pytest.mark.parametrize('columns', ['unknown', 'name__foo', 'contract__event', 'support_staff__password'])
+def test_columns_projection_rejects_invalid_fields(columns):
+    with pytest.raises(CommandError):
+        EVENT_LISTING.select_columns(columns)
@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from EpicEvents.models import Event, Contract, User, Client
+from EpicEvents.permissions import AuthContext, check_object_permissions
+from EpicEvents.permission_cache import PermissionCache, permission_cache, ALLOWED, DENIED
+from datetime import date
+
+
+@pytest.fixture
+def event():
+    permission_cache.clear()
+    sales = User.objects.create_user(username='testsales', fullname='Test sales', role='sales')
+    support = User.objects.create_user(username='testsupport', fullname='Test support', role='support')
+    client = Client.objects.create(fullname="Client Test", email="test@example.com", sales_rep=sales)
+    contract = Contract.objects.create(client=client, sales_rep=sales, total_amount=1000,
+                                       amount_remaining=500, status='signed')
+    return Event.objects.create(contract=contract, name="event", start_date=date(2024, 1, 1),
+                                end_date=date(2024, 1, 2), support_staff=support, location="location",
+                                attendees=10, notes="notes")
+
+
+def check(user, event):
+    with CaptureQueriesContext(connection) as context:
+        allowed, denied, missing = check_object_permissions(Event, AuthContext(user), [event.pk])
+    return len(context.captured_queries), bool(allowed), bool(denied), bool(missing)
+
+
+@pytest.mark.django_db
+def test_repeated_denied_check_costs_one_query(event):
+    other_support = User.objects.create_user(username='othersupport', fullname='Other support', role='support')
+
+    assert check(other_support, event) == (2, False, True, False)
+    assert check(other_support, event) == (1, False, True, False)
+
+
+@pytest.mark.django_db
+def test_reassignment_by_another_process_is_seen_at_once(event):
+    other_support = User.objects.create_user(username='othersupport', fullname='Other support', role='support')
+    check(other_support, event)
+
+    # update() sends no signal, like a change made by another process
+    Event.objects.filter(pk=event.pk).update(support_staff=other_support)
+
+    assert check(other_support, event) == (1, True, False, False)
+
+
+@pytest.mark.django_db
+def test_reassignment_invalidates_the_decisions(event):
+    other_support = User.objects.create_user(username='othersupport', fullname='Other support', role='support')
+    check(other_support, event)
+
+    event.support_staff = other_support
+    event.save()
+
+    assert check(other_support, event) == (1, True, False, False)
+
+
+@pytest.mark.django_db
+def test_role_change_invalidates_the_decisions(event):
+    user = User.objects.create_user(username='testuser', fullname='Test user', role='sales')
+    check(user, event)
+
+    user.role = 'management'
+    user.save()
+
+    assert check(user, event)[1:] == (True, False, False)
+
+
+def test_least_recently_used_decision_is_dropped():
+    auth = AuthContext(claims={'user_id': 1, 'user_role': 'sales'})
+    cache = PermissionCache(size=2)
+    cache.set('edit', Event, 1, auth, ALLOWED)
+    cache.set('edit', Event, 2, auth, DENIED)
+    cache.get('edit', Event, 1, auth)
+
+    cache.set('edit', Event, 3, auth, DENIED)
+
+    assert cache.get('edit', Event, 1, auth) == ALLOWED
+    assert cache.get('edit', Event, 2, auth) is None
@@ -0,0 +1,57 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from EpicEvents.models import Event, Contract, User, Client
+from datetime import date
+
+
+@pytest.fixture
+def team():
+    # Two sales reps and two support staff, each owning one client, contract and event
+    management = User.objects.create_user(username='manager', fullname='Manager', role='management')
+    members = {'management': management}
+    for name in ('a', 'b'):
+        sales = User.objects.create_user(username=f'sales_{name}', fullname=f'Sales {name}', role='sales')
+        support = User.objects.create_user(username=f'support_{name}', fullname=f'Support {name}', role='support')
+        client = Client.objects.create(fullname=f"Client {name}", email=f"{name}@gmail.com", sales_rep=sales)
+        contract = Contract.objects.create(client=client, sales_rep=sales, total_amount=1000,
+                                           amount_remaining=500, status='signed')
+        Event.objects.create(contract=contract, name=f"event {name}", start_date=date(2024, 1, 1),
+                             end_date=date(2024, 1, 2), support_staff=support, location="location",
+                             attendees=10, notes="notes")
+        members[f'sales_{name}'] = sales
+        members[f'support_{name}'] = support
+    return members
+
+
+def names(queryset, field='name'):
+    return sorted(queryset.values_list(field, flat=True))
+
+
+@pytest.mark.django_db
+def test_event_rules(team):
+    assert names(Event.objects.visible_to(team['support_a'])) == ["event a"]
+    assert names(Event.objects.visible_to(team['sales_a'])) == ["event a", "event b"]
+    assert names(Event.objects.editable_by(team['support_b'])) == ["event b"]
+    assert names(Event.objects.editable_by(team['management'])) == ["event a", "event b"]
+    assert names(Event.objects.editable_by(team['sales_a'])) == []
+
+
+@pytest.mark.django_db
+def test_contract_and_client_rules(team):
+    assert names(Contract.objects.editable_by(team['sales_a']), 'client__fullname') == ["Client a"]
+    assert names(Contract.objects.editable_by(team['management']), 'client__fullname') == ["Client a", "Client b"]
+    assert names(Contract.objects.editable_by(team['support_a']), 'client__fullname') == []
+    assert names(Client.objects.owned_by(team['sales_b']), 'fullname') == ["Client b"]
+    assert names(Client.objects.editable_by(team['management']), 'fullname') == []
+    assert names(Client.objects.visible_to(team['support_a']), 'fullname') == ["Client a", "Client b"]
+
+
+@pytest.mark.django_db
+def test_rules_are_sql_predicates(team):
+    with CaptureQueriesContext(connection) as context:
+        event = Event.objects.editable_by(team['support_a']).get(name="event a")
+
+    assert event.support_staff_id == team['support_a'].id
+    assert len(context.captured_queries) == 1
+    assert '"support_staff_id" = ' in context.captured_queries[0]['sql']
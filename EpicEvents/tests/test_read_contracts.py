@@ -189,3 +189,49 @@ def test_read_contracts_unauthenticated_user(mocker):
             call_command('read_contracts')
         except CommandError as e:
             assert str(e) == expected_output
+
+
+@pytest.mark.django_db
+def test_read_contracts_with_date_range(mocker):
+    user = User.objects.create_user(username='testuser', password='testpassword',
+                                    fullname='Test User', role='management')
+    client_a = Client.objects.create(fullname="Client A", email="clientA@gmail.com",
+                                     phone="0606060606", company_name="company_name A", sales_rep=user)
+    Contract.objects.create(client=client_a, sales_rep=user, total_amount=1000,
+                            amount_remaining=500, status='signed')
+
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+
+    output = StringIO()
+    call_command('read_contracts', '--created-within', 'today', stdout=output)
+    call_command('read_contracts', '--created-to', '2000-01', stdout=output)
+
+    assert "Client A" in output.getvalue()
+    assert "No Contract found." in output.getvalue()
+
+
+@pytest.mark.django_db
+def test_read_contracts_with_amount_ranges(mocker):
+    user = User.objects.create_user(username='testuser', password='testpassword',
+                                    fullname='Test User', role='management')
+    client_a = Client.objects.create(fullname="Client A", email="clientA@gmail.com",
+                                     phone="0606060606", company_name="company_name A", sales_rep=user)
+    client_b = Client.objects.create(fullname="Client B", email="clientB@gmail.com",
+                                     phone="0707070707", company_name="company_name B", sales_rep=user)
+    Contract.objects.create(client=client_a, sales_rep=user, total_amount=1000,
+                            amount_remaining=0, status='signed')
+    Contract.objects.create(client=client_b, sales_rep=user, total_amount=5000,
+                            amount_remaining=2000, status='signed')
+
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+
+    unpaid, owed, total = StringIO(), StringIO(), StringIO()
+    call_command('read_contracts', '--unpaid', stdout=unpaid)
+    call_command('read_contracts', '--min-remaining', '2000', stdout=owed)
+    call_command('read_contracts', '--min-total', '500', '--max-total', '1000', stdout=total)
+
+    assert "Client B" in unpaid.getvalue() and "Client A" not in unpaid.getvalue()
+    assert "Client B" in owed.getvalue() and "Client A" not in owed.getvalue()
+    assert "Client A" in total.getvalue() and "Client B" not in total.getvalue()
@@ -0,0 +1,115 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from EpicEvents.models import Event, Contract, User, Client
+from EpicEvents.filters import filter_search, fts_query
+from EpicEvents.listing import EVENT_LISTING
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+
+@pytest.fixture
+def contract():
+    sales_rep = User.objects.create_user(username='commerA', fullname='sales A', role='sales')
+    client = Client.objects.create(fullname="Jeanne Dupont", email="jeanne@dupont.fr",
+                                   phone="0606060606", company_name="Conférences Dupont", sales_rep=sales_rep)
+    return Contract.objects.create(client=client, sales_rep=sales_rep, total_amount=1000,
+                                   amount_remaining=500, status='signed')
+
+
+@pytest.fixture
+def support():
+    return User.objects.create_user(username='suppA', fullname='Support A', role='support')
+
+
+def create_event(contract, support, name, location="Paris", notes=""):
+    return Event.objects.create(contract=contract, name=name, start_date=datetime(2023, 12, 15),
+                                end_date=datetime(2023, 12, 16), support_staff=support,
+                                location=location, attendees=50, notes=notes)
+
+
+def search_names(text):
+    return [event.name for event in EVENT_LISTING.page(filter_search(Event.objects.all(), text), {'search': text})]
+
+
+def test_fts_query_matches_every_word_as_a_prefix():
+    assert fts_query('conf "Lyon') == '"conf"* "Lyon"*'
+
+    with pytest.raises(CommandError):
+        fts_query('" *')
+
+
+@pytest.mark.django_db
+def test_search_matches_prefixes_and_ranks_best_matches_first(contract, support):
+    create_event(contract, support, "Wedding", notes="Conference room booked")
+    create_event(contract, support, "Conference", location="Lyon", notes="Conference with a conference dinner")
+    create_event(contract, support, "Birthday")
+
+    assert search_names("conf") == ["Conference", "Wedding"]
+    assert search_names("conf lyon") == ["Conference"]
+    assert search_names("anniversary") == []
+
+
+@pytest.mark.django_db
+def test_search_index_follows_updates_and_deletions(contract, support):
+    event = create_event(contract, support, "Wedding")
+    other = create_event(contract, support, "Birthday party")
+
+    event.name = "Seminar"
+    event.save()
+    other.delete()
+
+    assert search_names("wedding") == []
+    assert search_names("semin") == ["Seminar"]
+    assert search_names("party") == []
+
+
+@pytest.mark.django_db
+def test_search_results_are_paged_by_rank(contract, support):
+    for i in range(5):
+        create_event(contract, support, f"Gala {i}", notes="gala " * i)
+    expected = search_names("gala")
+
+    names, after = [], None
+    while True:
+        page = EVENT_LISTING.page(filter_search(Event.objects.all(), "gala"),
+                                  {'search': "gala", 'page_size': 2, 'after': after})
+        names += [event.name for event in page]
+        after = page.next_cursor
+        if after is None:
+            break
+
+    assert names == expected and len(names) == 5
+
+
+@pytest.mark.django_db
+def test_read_clients_and_contracts_search(mocker, contract):
+    user = User.objects.create_user(username='testuser', password='testpassword',
+                                    fullname='Test User', role='management')
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+
+    output = StringIO()
+    call_command('read_clients', '--search', 'conferences dup', stdout=output)
+    call_command('read_contracts', '--search', 'jeanne', stdout=output)
+    call_command('read_clients', '--search', 'unknown', stdout=output)
+
+    assert output.getvalue().count("Jeanne Dupont") == 2
+    assert "No clients found." in output.getvalue()
+
+
+@pytest.mark.django_db
+def test_search_is_ignored_with_an_id(mocker, contract, support):
+    user = User.objects.create_user(username='testuser', password='testpassword',
+                                    fullname='Test User', role='management')
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+    event = create_event(contract, support, "Conference")
+
+    output = StringIO()
+    call_command('read_events', str(event.id), '--search', 'conf', stdout=output)
+    call_command('read_clients', str(contract.client_id), '--search', 'jeanne', stdout=output)
+    call_command('read_contracts', str(contract.id), '--search', 'jeanne', stdout=output)
+
+    assert "Conference" in output.getvalue()
+    assert output.getvalue().count("Jeanne Dupont") >= 2
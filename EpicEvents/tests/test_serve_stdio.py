@@ -0,0 +1,74 @@
+import io
+import json
+import pytest
+from django.core.management import call_command
+from EpicEvents.auth_utils import generate_token, delete_token
+from EpicEvents.models import Client, Contract, User
+from datetime import datetime, timedelta, timezone
+
+
+@pytest.fixture
+def token(tmp_path, monkeypatch):
+    # Token of a sales user, the session has no token file: the requests carry the token
+    monkeypatch.chdir(tmp_path)
+    user = User.objects.create_user(username='testsales', fullname='Test sales', role='sales')
+    token = generate_token(user, datetime.now(timezone.utc) + timedelta(hours=2))
+    delete_token()
+    return token
+
+
+def serve(mocker, capsys, *requests):
+    mocker.patch('sys.stdin', io.StringIO(''.join(
+        (request if isinstance(request, str) else json.dumps(request)) + '\n' for request in requests)))
+    call_command('serve_stdio')
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+@pytest.mark.django_db
+def test_pipelined_requests_are_answered_in_order(token, mocker, capsys):
+    responses = serve(
+        mocker, capsys,
+        {'id': 1, 'token': token, 'command': 'create_client',
+         'args': ['--fullname', 'Client A', '--email', 'a@example.com', '--phone', '01', '--company_name', 'A']},
+        {'id': 2, 'token': token, 'command': 'read_clients', 'args': ['--format', 'csv', '--columns', 'fullname']},
+        {'id': 3, 'token': token, 'command': 'update_client', 'args': [999]},
+    )
+
+    assert [(response['id'], response['ok']) for response in responses] == [(1, True), (2, True), (3, False)]
+    assert f"Client ID: {Client.objects.get().id}" in responses[0]['stdout']
+    assert responses[1]['stdout'].splitlines() == ['fullname', 'Client A']
+    assert responses[2]['exit'] == 1 and responses[2]['error']
+
+
+@pytest.mark.django_db
+def test_invalid_requests_do_not_stop_the_server(token, mocker, capsys):
+    responses = serve(
+        mocker, capsys,
+        'not json',
+        {'id': 1, 'token': 'invalid', 'command': 'read_clients'},
+        {'id': 2, 'command': 'read_clients'},
+        {'id': 3, 'token': token, 'command': 'create_client', 'args': ['--fullname', 'Client A']},
+        {'id': 4, 'token': token, 'command': 'read_clients'},
+    )
+
+    assert responses[0]['error'].startswith("Invalid request")
+    assert responses[1]['error'] == "Invalid token. Please log in."
+    assert responses[2]['error'] == "User not logged in. Please log in."
+    assert responses[3]['error'] == "create_client asks for input, give all its options"
+    assert responses[4]['ok'] is True
+
+
+@pytest.mark.django_db
+def test_help_and_command_errors_are_in_the_response(token, mocker, capsys):
+    sales = User.objects.get(username='testsales')
+    client = Client.objects.create(fullname="Client A", email="a@example.com", sales_rep=sales)
+    contract = Contract.objects.create(client=client, sales_rep=sales, total_amount=1000, amount_remaining=500)
+    responses = serve(
+        mocker, capsys,
+        {'id': 1, 'token': token, 'command': 'read_clients', 'args': ['--help']},
+        {'id': 2, 'token': token, 'command': 'update_contract', 'args': [contract.id, '--status', 'unknown']},
+    )
+
+    assert [(response['id'], response['ok']) for response in responses] == [(1, True), (2, False)]
+    assert responses[0]['stdout'].startswith("usage: manage.py read_clients")
+    assert responses[1]['error'].startswith("Status 'unknown' is invalid")
@@ -0,0 +1,32 @@
+from django.core.management import call_command
+from EpicEvents.management.commands.startup_profile import parse_import_times, aggregate_import_times
+from io import StringIO
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   django.utils
+import time:       300 |        420 | django
+import time:        80 |         80 | jwt.algorithms
+import time:        20 |        100 | jwt
+"""
+
+
+def test_import_times_are_aggregated_by_package():
+    modules = parse_import_times(IMPORTTIME_OUTPUT.splitlines())
+
+    assert modules == [('django.utils', 120), ('django', 300), ('jwt.algorithms', 80), ('jwt', 20)]
+    assert aggregate_import_times(modules) == [('django', 420, 2), ('jwt', 100, 2)]
+    assert aggregate_import_times(modules, by='module')[0] == ('django', 300, 1)
+
+
+def test_startup_profile_reports_the_setup_time(monkeypatch):
+    # without a DSN the settings do not import sentry_sdk
+    monkeypatch.setenv('SENTRY_DSN', '')
+    out = StringIO()
+    call_command('startup_profile', 'read_events', '--top', '1000', stdout=out)
+
+    output = out.getvalue()
+    packages = [line.split('|')[1].strip() for line in output.splitlines() if line.startswith('|')]
+    assert 'django' in packages
+    assert 'sentry_sdk' not in packages
+    assert 'django.setup() (settings, apps and their imports):' in output
+    assert 'Import of the read_events command:' in output
@@ -0,0 +1,90 @@
+import json
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from EpicEvents.models import Event, Contract, User, Client
+from EpicEvents.listing import CONTRACT_LISTING, EVENT_LISTING, CLIENT_LISTING
+from EpicEvents.filters import filter_search
+from datetime import date, datetime, timedelta, timezone
+from io import StringIO
+
+
+@pytest.fixture
+def contracts():
+    sales_a = User.objects.create_user(username='commerA', fullname='sales A', role='sales')
+    sales_b = User.objects.create_user(username='commerB', fullname='sales B', role='sales')
+    support = User.objects.create_user(username='suppA', fullname='Support A', role='support')
+    client_a = Client.objects.create(fullname="Client A", email="clientA@gmail.com",
+                                     phone="0606060606", company_name="company A", sales_rep=sales_a)
+    client_b = Client.objects.create(fullname="Client B", email="clientB@gmail.com",
+                                     phone="0707070707", company_name="company B", sales_rep=sales_b)
+    contracts = [
+        Contract.objects.create(client=client_a, sales_rep=sales_a, total_amount=1000, amount_remaining=500, status='signed'),
+        Contract.objects.create(client=client_a, sales_rep=sales_a, total_amount=2000, amount_remaining=0, status='signed'),
+        Contract.objects.create(client=client_b, sales_rep=sales_b, total_amount=4000, amount_remaining=4000,
+                                status='waiting for signature'),
+    ]
+    for i, (contract, month) in enumerate([(contracts[0], 1), (contracts[0], 1), (contracts[1], 2)]):
+        Event.objects.create(contract=contract, name=f"event {i}", start_date=date(2024, month, 10),
+                             end_date=date(2024, month, 11), support_staff=support,
+                             location="Paris", attendees=10 * (i + 1), notes="")
+    return contracts
+
+
+@pytest.mark.django_db
+def test_summary_by_group_is_a_single_query(contracts):
+    with CaptureQueriesContext(connection) as context:
+        fields, rows = CONTRACT_LISTING.summary(Contract.objects.all(), 'status')
+        rows = list(rows)
+
+    assert len(context.captured_queries) == 1
+    assert 'GROUP BY' in context.captured_queries[0]['sql']
+    assert fields == ['status', 'count', 'sum_total_amount', 'sum_amount_remaining']
+    assert rows == [['signed', 2, 3000, 500], ['waiting for signature', 1, 4000, 4000]]
+
+
+@pytest.mark.django_db
+def test_summary_without_group_counts_every_row(contracts):
+    fields, rows = CONTRACT_LISTING.summary(Contract.objects.filter(status='signed'))
+
+    assert fields == ['count', 'sum_total_amount', 'sum_amount_remaining']
+    assert list(rows) == [[2, 3000, 500]]
+
+
+@pytest.mark.django_db
+def test_event_summary_by_month_and_client(contracts):
+    fields, rows = EVENT_LISTING.summary(Event.objects.all(), 'month')
+    assert list(rows) == [[date(2024, 1, 1), 2, 30], [date(2024, 2, 1), 1, 30]]
+
+    fields, rows = EVENT_LISTING.summary(Event.objects.all(), 'client')
+    assert fields == ['contract__client_id', 'contract__client__fullname', 'count', 'sum_attendees']
+    assert list(rows) == [[contracts[0].client_id, "Client A", 3, 60]]
+
+
+@pytest.mark.django_db
+def test_summary_of_search_results(contracts):
+    fields, rows = CLIENT_LISTING.summary(filter_search(Client.objects.all(), "company"), 'sales_rep')
+
+    assert list(rows) == [['commerA', 1], ['commerB', 1]]
+
+
+@pytest.mark.django_db
+def test_read_contracts_group_by(mocker, contracts):
+    user = User.objects.create_user(username='testuser', password='testpassword',
+                                    fullname='Test User', role='management')
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=user)
+
+    output = StringIO()
+    call_command('read_contracts', '--group-by', 'sales_rep', '--status', 'signed', '--format', 'jsonl', stdout=output)
+
+    assert [json.loads(line) for line in output.getvalue().splitlines()] == [
+        {'sales_rep__username': 'commerA', 'count': 2, 'sum_total_amount': 3000.0, 'sum_amount_remaining': 500.0},
+    ]
+
+    output = StringIO()
+    call_command('read_contracts', '--count', stdout=output)
+
+    assert "List of Contracts (summary)" in output.getvalue()
+    assert "|   3   |      7000.0      |        4500.0        |" in output.getvalue()
@@ -0,0 +1,66 @@
+import io
+import json
+import pytest
+import sentry_sdk
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from sentry_sdk.integrations.django import DjangoIntegration
+from EpicEvents.auth_utils import generate_token
+from EpicEvents.models import User
+from datetime import datetime, timedelta, timezone
+from EpicEventsCRM.tracing import make_traces_sampler, parse_sample_rates, trace_command, SpanFileTransport
+
+
+@pytest.fixture
+def span_file(tmp_path):
+    # Sentry client writing the spans of every command to a file, removed after the test
+    path = tmp_path / 'spans.jsonl'
+    sentry_sdk.init(transport=SpanFileTransport(str(path)), traces_sample_rate=1.0,
+                    default_integrations=False, integrations=[DjangoIntegration()])
+    yield path
+    sentry_sdk.Hub.current.bind_client(None)
+
+
+class CountUsers(BaseCommand):
+    __module__ = 'EpicEvents.management.commands.count_users' # The command name is the name of its module
+
+    @trace_command
+    def execute(self, *args, **options):
+        return str(User.objects.count())
+
+
+def test_sample_rates_are_set_per_command():
+    sampler = make_traces_sampler(0.1, parse_sample_rates("read_events=1, login=0"))
+
+    assert sampler({'transaction_context': {'name': 'read_events'}}) == 1.0
+    assert sampler({'transaction_context': {'name': 'login'}}) == 0.0
+    assert sampler({'transaction_context': {'name': 'read_users'}}) == 0.1
+
+
+@pytest.mark.django_db
+def test_command_spans_are_written_to_the_span_file(span_file):
+    CountUsers().execute()
+    sentry_sdk.flush()
+
+    records = [json.loads(line) for line in span_file.read_text().splitlines()]
+    assert records[0]['op'] == 'command' and records[0]['description'] == 'count_users'
+    assert records[0]['duration_ms'] >= 0
+    # the query of the command is a child span
+    assert [record['parent_span_id'] for record in records if record['op'] == 'db'] == [records[0]['span_id']]
+    assert all(record['transaction'] == 'count_users' for record in records)
+
+
+@pytest.mark.django_db
+def test_each_command_of_a_script_is_a_transaction(span_file, tmp_path, monkeypatch, mocker):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(BaseCommand, 'execute', trace_command(BaseCommand.execute))
+    user = User.objects.create_user(username='testmanager', fullname='Test manager', role='management')
+    generate_token(user, datetime.now(timezone.utc) + timedelta(hours=2))
+    mocker.patch('sys.stdin', io.StringIO("read_users\nread_clients --count\n"))
+
+    call_command('execute', script='-')
+    sentry_sdk.flush()
+
+    records = [json.loads(line) for line in span_file.read_text().splitlines()]
+    assert [record['description'] for record in records if record['op'] == 'command'] == ['read_users', 'read_clients']
+    assert {record['transaction'] for record in records} == {'read_users', 'read_clients'}
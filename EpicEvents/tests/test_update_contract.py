@@ -1,8 +1,11 @@
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from EpicEvents.models import User, Client, Contract
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from unittest.mock import patch, Mock
 from datetime import datetime, timedelta, timezone
+from io import StringIO
 import pytest
 
 
@@ -206,11 +209,8 @@ def test_update_contract_not_authenticated(mocker, capsys):
         # Mock to bypass permission check
         mocker.patch('EpicEvents.permissions.get_user_role_from_token', return_value='management')
 
-        # Mock the load_token function to return a valid token
-        mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
-
-        # Mock the validate_token function to return a valid user
-        mocker.patch('EpicEvents.permissions.validate_token', return_value=(None, None))
+        # Mock the load_token function to return no token
+        mocker.patch('EpicEvents.permissions.load_token', return_value=(None, None))
 
         # Capturing standard output for verification
         with patch('sys.stderr', new_callable=Mock) as mock_stderr:
@@ -221,3 +221,39 @@ def test_update_contract_not_authenticated(mocker, capsys):
             except CommandError as ce:
                 # Checking the error message
                 assert str(ce) == "User not logged in. Please log in."
+
+
+@pytest.mark.django_db
+def test_update_contract_reads_the_contract_once(mocker):
+    sales = User.objects.create_user(
+            username='comtest',
+            fullname='sales Test', 
+            role='sales'
+        )
+
+    client = Client.objects.create(
+            fullname="CLient A", 
+            email="clientA@gmail.com",
+            sales_rep_id=sales.id
+        )
+
+    contract = Contract.objects.create(
+            client_id=client.id,
+            sales_rep_id=sales.id,
+            total_amount=1000,
+            amount_remaining=500,
+            status='waiting for signature'
+        )
+
+    # The logged in user is the sales rep of the contract
+    mocker.patch('EpicEvents.permissions.load_token', return_value=('test_token', datetime.now(timezone.utc) + timedelta(days=1)))
+    mocker.patch('EpicEvents.permissions.validate_token', return_value=sales)
+
+    with CaptureQueriesContext(connection) as context:
+        call_command('update_contract', int(contract.id), '--status', 'signed', stdout=StringIO())
+
+    # The permission check and the update share a single SELECT of the contract
+    selects = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+    assert len(selects) == 1
+    contract.refresh_from_db()
+    assert contract.status == 'signed'
@@ -1,15 +1,16 @@
 import os
 from pathlib import Path
-import sentry_sdk
 from dotenv import load_dotenv
 
 load_dotenv()
 
 dsn = os.getenv('SENTRY_DSN')
-sentry_sdk.init(
-    dsn=dsn,
-    enable_tracing=True,
-)
+span_file = os.getenv('SENTRY_SPAN_FILE')
+if dsn or span_file:
+    # sentry_sdk and its integrations are only imported when errors or spans are reported, they take a large part
+    # of the start-up time of a command. The sample rates are read from the environment, see EpicEventsCRM.tracing
+    from EpicEventsCRM.tracing import init_sentry
+    init_sentry(dsn, span_file)
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -0,0 +1,136 @@
+# Description: Sentry set-up of the project. The commands are traced with a sample rate per command, and their
+# spans can be written to a local JSONL file instead of being sent to Sentry (hosts without network access).
+# This module is only imported by the settings when SENTRY_DSN or SENTRY_SPAN_FILE is set.
+import functools
+import json
+import os
+from datetime import datetime
+import sentry_sdk
+from sentry_sdk.transport import Transport
+from sentry_sdk.worker import BackgroundWorker
+
+DEFAULT_QUEUE_SIZE = 100 # Envelopes waiting to be sent or written, the next ones are dropped
+UNTRACED_COMMANDS = ('crm_server', 'serve_stdio', 'execute', 'runserver', 'shell') # Long running commands, the commands they run are traced
+SPAN_FIELDS = ('trace_id', 'span_id', 'parent_span_id', 'op', 'description', 'status')
+
+
+def parse_sample_rates(value):
+    # Parses "read_events=0.5,login=0" into {'read_events': 0.5, 'login': 0.0}
+    rates = {}
+    for item in filter(None, (item.strip() for item in (value or '').split(','))):
+        name, _, rate = item.partition('=')
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def make_traces_sampler(default_rate, command_rates):
+    # Sample rate of a transaction: the rate of its command, or the default rate
+    def traces_sampler(sampling_context):
+        name = sampling_context.get('transaction_context', {}).get('name')
+        return command_rates.get(name, default_rate)
+    return traces_sampler
+
+
+def parse_timestamp(value):
+    # The timestamps of the serialized events are ISO 8601 strings
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def span_records(event):
+    # One record per span of a transaction event, the transaction itself first
+    trace = event.get('contexts', {}).get('trace', {})
+    spans = [dict(trace, description=event.get('transaction'),
+                  start_timestamp=event.get('start_timestamp'), timestamp=event.get('timestamp'))]
+    spans.extend(event.get('spans', []))
+    for span in spans:
+        record = {field: span.get(field) for field in SPAN_FIELDS}
+        start, end = parse_timestamp(span.get('start_timestamp')), parse_timestamp(span.get('timestamp'))
+        record['transaction'] = event.get('transaction')
+        record['start'] = start.isoformat() if start else None
+        record['duration_ms'] = round((end - start).total_seconds() * 1000, 3) if start and end else None
+        yield record
+
+
+class SpanFileTransport(Transport):
+    # Appends the spans of the transactions to a JSONL file from a background thread with a bounded queue.
+    # The other envelopes (errors, sessions) go to the Sentry transport when a DSN is set, and are dropped otherwise.
+    def __init__(self, path, queue_size=DEFAULT_QUEUE_SIZE, upstream=None):
+        super().__init__()
+        self.path = path
+        self.upstream = upstream
+        self.worker = BackgroundWorker(queue_size)
+
+    def capture_event(self, event):
+        if self.upstream is not None:
+            self.upstream.capture_event(event)
+
+    def capture_envelope(self, envelope):
+        transactions = [item.payload.json for item in envelope.items if item.type == 'transaction']
+        if not transactions:
+            if self.upstream is not None:
+                self.upstream.capture_envelope(envelope)
+            return
+        if not self.worker.submit(functools.partial(self.write, transactions)):
+            self.record_lost_event('queue_overflow', data_category='transaction')
+
+    def write(self, transactions):
+        lines = [json.dumps(record, default=str) + '\n'
+                 for event in transactions for record in span_records(event)]
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        # A single append per transaction, so the lines of concurrent processes are not interleaved
+        with open(self.path, 'a') as file:
+            file.write(''.join(lines))
+
+    def flush(self, timeout, callback=None):
+        self.worker.flush(timeout, callback)
+        if self.upstream is not None:
+            self.upstream.flush(timeout, callback)
+
+    def kill(self):
+        self.worker.kill()
+        if self.upstream is not None:
+            self.upstream.kill()
+
+
+def trace_command(execute):
+    # Wraps BaseCommand.execute in a transaction named after the command. A command run by another traced
+    # command (call_command) is a child span of its transaction. The DB queries are recorded as child spans
+    # by the Django integration of Sentry.
+    @functools.wraps(execute)
+    def wrapper(self, *args, **options):
+        name = self.__module__.rsplit('.', 1)[-1]
+        if name in UNTRACED_COMMANDS:
+            return execute(self, *args, **options)
+        parent = sentry_sdk.Hub.current.scope.span
+        if parent is not None:
+            span = parent.start_child(op='command', description=name)
+        else:
+            span = sentry_sdk.start_transaction(op='command', name=name, source='task')
+        with span:
+            return execute(self, *args, **options)
+    wrapper.traced = True
+    return wrapper
+
+
+def init_sentry(dsn=None, span_file=None, environ=os.environ):
+    # Configures Sentry from the environment:
+    # - SENTRY_TRACES_SAMPLE_RATE: share of the commands traced (0 by default)
+    # - SENTRY_COMMAND_SAMPLE_RATES: rates of some commands, e.g. "read_events=0.5,login=0"
+    # - SENTRY_QUEUE_SIZE: envelopes waiting to be sent or written, the next ones are dropped
+    # - SENTRY_SPAN_FILE: JSONL file receiving the spans instead of Sentry
+    from django.core.management.base import BaseCommand
+
+    queue_size = int(environ.get('SENTRY_QUEUE_SIZE') or DEFAULT_QUEUE_SIZE)
+    default_rate = float(environ.get('SENTRY_TRACES_SAMPLE_RATE') or 0)
+    command_rates = parse_sample_rates(environ.get('SENTRY_COMMAND_SAMPLE_RATES'))
+    sentry_sdk.init(
+        dsn=dsn,
+        traces_sampler=make_traces_sampler(default_rate, command_rates),
+        transport_queue_size=queue_size,
+    )
+    if span_file:
+        client = sentry_sdk.Hub.current.client
+        client.transport = SpanFileTransport(span_file, queue_size, upstream=client.transport)
+
+    if not getattr(BaseCommand.execute, 'traced', False):
+        BaseCommand.execute = trace_command(BaseCommand.execute)
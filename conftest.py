@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def session_dir(tmp_path, monkeypatch):
+    # The token files and the revocation cache of each test are written in its own temporary directory, not in the
+    # session directory of the OS user nor in the checkout
+    monkeypatch.setattr('EpicEvents.auth_utils.SESSION_DIR', str(tmp_path / 'sessions'))
+    return tmp_path / 'sessions'
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Thin client of the crm_server command: `python crm.py <command> [options]` runs the command in the warm server
+process and streams its output back. Without a running server, or for the commands using the terminal (login,
+execute and the prompts of the create_* commands), the command runs locally through manage.py.
+`python crm.py --complete <index of the word> <words>` answers the shell completion from the index of the session,
+without loading Django."""
+import getpass
+import json
+import os
+import re
+import sys
+import time
+
+
+def default_session_dir():
+    # Same as EpicEvents.auth_utils.default_session_dir, the project directory is the directory of crm.py
+    base = os.path.join(os.environ['XDG_RUNTIME_DIR'], 'epicevents') if os.getenv('XDG_RUNTIME_DIR') \
+        else os.path.join(os.path.expanduser('~'), '.epicevents')
+    project_dir = os.path.dirname(os.path.realpath(__file__))
+    return os.path.join(base, re.sub(r'[^\w.-]', '_', project_dir.strip(os.sep)))
+
+
+SESSION_DIR = os.getenv('EPICEVENTS_SESSION_DIR') or default_session_dir() # Same default as EpicEvents.auth_utils
+SOCKET_PATH = os.getenv('EPICEVENTS_SOCKET', os.path.join(SESSION_DIR, 'crm.sock')) # Same default as crm_server
+LOCAL_COMMANDS = ('login', 'execute', 'crm_server', 'serve_stdio')
+INDEX_MAX_AGE = 30 # Seconds after which the completion index is refreshed in the background
+
+
+def get_session_id():
+    # Same as EpicEvents.auth_utils.get_session_id
+    session = os.getenv('EPICEVENTS_SESSION') or getpass.getuser()
+    return re.sub(r'[^\w.-]', '_', session)
+
+
+def run_locally(argv):
+    manage = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'manage.py')
+    os.execv(sys.executable, [sys.executable, manage, *argv])
+
+
+def run_on_server(argv):
+    # Returns the exit code of the command, or None when it must run locally
+    import socket # Imported here, the completion does not need it
+    try:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(SOCKET_PATH)
+    except OSError:
+        return None
+
+    with connection:
+        # The session is resolved by the server from the working directory, like manage.py would
+        request = {'argv': argv, 'cwd': os.getcwd(), 'session': get_session_id(),
+                   'session_dir': os.getenv('EPICEVENTS_SESSION_DIR'), 'color': sys.stdout.isatty()}
+        connection.sendall((json.dumps(request) + '\n').encode())
+
+        for line in connection.makefile('r'):
+            message = json.loads(line)
+            if 'exit' in message:
+                return None if message['interactive'] else message['exit']
+            for name, stream in (('stdout', sys.stdout), ('stderr', sys.stderr)):
+                if name in message:
+                    stream.write(message[name])
+                    stream.flush()
+    return 1 # The server stopped before the end of the command
+
+
+def refresh_index_in_background(path):
+    # The refresh loads Django, the completion answers from the current index without waiting for it
+    import subprocess # Imported here, it is only needed when the index is stale
+    try:
+        os.utime(path) # The next completions do not start another refresh
+    except FileNotFoundError:
+        pass
+    manage = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'manage.py')
+    subprocess.Popen([sys.executable, manage, 'completion', 'refresh'], start_new_session=True,
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def id_candidates(index, model_name, current):
+    # IDs starting with the typed digits, or whose name contains the typed text, with their name
+    text = current.lower()
+    names = index.get(model_name, {})
+    return [f"{pk}\t{names[pk]}" for pk in sorted(names, key=int)
+            if pk.startswith(current) or (text and text in names[pk].lower())]
+
+
+def complete(cword, words, index):
+    # Candidates of the word at position cword of the command line (words[0] is crm.py or manage.py)
+    commands = index.get('commands', {})
+    current = words[cword] if cword < len(words) else ''
+    if cword <= 1:
+        return [name for name in sorted(commands) if name.startswith(current)]
+    spec = commands.get(words[1])
+    if spec is None:
+        return []
+    previous = words[cword - 1]
+    if previous in spec['ids']:
+        return id_candidates(index, spec['ids'][previous], current)
+    if previous in spec['values']:
+        return [value for value in spec['values'][previous] if value.startswith(current)]
+    if current.startswith('-'):
+        return [option for option in spec['options'] if option.startswith(current)]
+    if spec['positional']:
+        return id_candidates(index, spec['positional'], current)
+    return []
+
+
+def main_complete(argv):
+    path = os.path.join(SESSION_DIR, f"{get_session_id()}.index.json")
+    try:
+        with open(path, 'r') as index_file:
+            index = json.load(index_file)
+        age = time.time() - os.path.getmtime(path)
+    except (OSError, ValueError):
+        index, age = {}, None
+    if age is None or age > INDEX_MAX_AGE:
+        refresh_index_in_background(path)
+    for candidate in complete(int(argv[0]), argv[1:], index):
+        print(candidate)
+
+
+def main():
+    argv = sys.argv[1:]
+    if argv[:1] == ['--complete']:
+        return main_complete(argv[1:])
+    exit_code = None
+    if argv and argv[0] not in LOCAL_COMMANDS:
+        try:
+            exit_code = run_on_server(argv)
+        except BrokenPipeError:
+            # The reader of the output stopped (`| head`): the server sees the client disconnect and stops the command
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            exit_code = 1
+    if exit_code is None:
+        run_locally(argv)
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()